@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+
+# --- GUNICORN (web process, see Procfile) ---
+# gunicorn loads this file from the working directory by default.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Import Django and the app once in the master, before forking: workers
+# start from a copy of the loaded interpreter (shared copy-on-write memory)
+# instead of each importing everything again, so a restart or scale-up
+# serves sooner
+preload_app = True
+
+# Threaded workers: requests spend most of their time waiting on Postgres,
+# Redis or GitHub, so a few processes with several threads each use the
+# container's memory better than many single-threaded processes
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', str(min(multiprocessing.cpu_count() * 2, 4))))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+
+# Recycle workers now and then, staggered so they never restart together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Database connections must never be shared across processes; the
+    # master should not have opened one, but drop any it did
+    from django.db import connections
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Runs in each worker after the fork and before it accepts requests
+    from django.conf import settings
+
+    if settings.WARMUP_ON_START:
+        from portfolio import warmup
+        # gthread workers serve from worker.tpool, one DB connection per thread
+        warmup.warm_up(executor=getattr(worker, 'tpool', None), threads=worker.cfg.threads)
@@ -14,3 +14,17 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_asgi_application()
+
+# uvicorn has no worker hooks: warm up while the module is imported, which
+# each worker process does before it starts serving (see portfolio/warmup.py).
+# uvicorn imports the app from inside its event loop, where Django refuses
+# synchronous queries, so the warm-up runs on a thread of its own.
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_START:
+    import threading
+    from portfolio import warmup
+
+    thread = threading.Thread(target=warmup.warm_up, name='warmup')
+    thread.start()
+    thread.join()
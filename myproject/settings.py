@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # 1. Load environment variables from .env file
@@ -44,11 +45,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.gzip.GZipMiddleware',
+    # Outermost so it times everything below it (see METRICS_* below)
+    'portfolio.middleware.MetricsMiddleware',
+    # br/zstd/gzip, cached per ETag (see COMPRESSION_ENCODINGS below)
+    'portfolio.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     
     # Whitenoise must be high up to serve static files efficiently
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Exported home page/JSON for anonymous visitors (see SNAPSHOT_* below)
+    'portfolio.middleware.SnapshotMiddleware',
     
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +82,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'myproject.wsgi.application'
+ASGI_APPLICATION = 'myproject.asgi.application'
 
 # --- DATABASE ---
 
@@ -128,19 +135,190 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-    ]
+    ],
+    # JSONRenderer plus an orjson fast path for values()-built list payloads
+    'DEFAULT_RENDERER_CLASSES': [
+        'portfolio.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
-# --- CLOUDINARY CONFIGURATION (Manual) ---
-# We manually configure the library because we are using 'pip install cloudinary'
-import cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+# --- CLOUDINARY CONFIGURATION ---
+# Read by portfolio/uploads.py, which imports and configures the cloudinary
+# library on the first upload instead of at settings load
+CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
+CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
+CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
+
+# --- MEDIA UPLOADS (portfolio/uploads.py) ---
+
+# Cloudinary uploads are sent in chunks of this many bytes (minimum 5 MB)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(6 * 1024 * 1024)))
+
+# Background threads per process that push uploads to Cloudinary
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '2'))
+
+# Where uploads wait for Cloudinary (default: the system temp directory).
+# Each upload is an 'upload' job; for run_jobs to retry a failed one, or
+# finish one a recycled web worker left behind, this directory has to be
+# shared with the run_jobs process.
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR', '')
 
 # --- AUTH REDIRECTS ---
 
 LOGIN_REDIRECT_URL = 'home'
-LOGOUT_REDIRECT_URL = 'home'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'home'
+
+# --- GITHUB SYNC ---
+
+GITHUB_USERNAME = os.getenv('GITHUB_USERNAME', 'DarkSun2003')
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+
+# Max number of languages_url requests in flight during a deep sync
+GITHUB_SYNC_CONCURRENCY = int(os.getenv('GITHUB_SYNC_CONCURRENCY', '8'))
+
+# Per-request timeout (seconds) for every call to the GitHub API
+GITHUB_REQUEST_TIMEOUT = float(os.getenv('GITHUB_REQUEST_TIMEOUT', '10'))
+
+# Personal access token (no scopes needed for public repos). Raises the API
+# limit from 60 to 5000 requests an hour.
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
+
+# Requests always left unspent in the rate limit window, so webhook syncs
+# still go through while a large deep sync is being spread out
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '10'))
+
+# Longest Retry-After (seconds) waited inline; longer waits defer the work
+GITHUB_MAX_RETRY_WAIT = int(os.getenv('GITHUB_MAX_RETRY_WAIT', '10'))
+
+# --- STAR AND LANGUAGE HISTORY (portfolio/history.py) ---
+
+# Days raw per-sync samples are kept; the API reads the rollups below
+HISTORY_SAMPLE_RETENTION_DAYS = int(os.getenv('HISTORY_SAMPLE_RETENTION_DAYS', '2'))
+
+# Days hourly and daily rollups are kept (weekly ones are never deleted)
+HISTORY_HOURLY_RETENTION_DAYS = int(os.getenv('HISTORY_HOURLY_RETENTION_DAYS', '7'))
+HISTORY_DAILY_RETENTION_DAYS = int(os.getenv('HISTORY_DAILY_RETENTION_DAYS', '366'))
+
+# /history/ uses the finest resolution that covers ?days= in this many points
+HISTORY_MAX_POINTS = int(os.getenv('HISTORY_MAX_POINTS', '400'))
+
+# --- BACKGROUND JOBS (manage.py run_jobs) ---
+
+# Seconds the worker sleeps when the queue is empty
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+
+# A failed job is retried after JOB_RETRY_BACKOFF * 2^(attempt-1) seconds
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', '30'))
+
+# Jobs stuck in 'running' longer than this are handed back to the queue
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', '600'))
+
+# --- GITHUB WEBHOOK ---
+
+# Shared secret configured on the GitHub webhook. Every delivery must carry
+# a valid X-Hub-Signature-256 header; without a secret all are refused.
+GITHUB_WEBHOOK_SECRET = os.getenv('GITHUB_WEBHOOK_SECRET', '')
+
+# Seconds a X-GitHub-Delivery id is remembered for de-duplication
+GITHUB_WEBHOOK_DELIVERY_TTL = int(os.getenv('GITHUB_WEBHOOK_DELIVERY_TTL', str(3 * 24 * 60 * 60)))
+
+# --- CACHING ---
+
+# The cache must be shared by every process (gunicorn workers, run_jobs):
+# the content version bumped by a write, the GitHub rate limit and the
+# snapshot flag live in it. Production needs Redis (REDIS_URL): a cached
+# read is one round trip to it. With DEBUG on and no REDIS_URL, a table in
+# the main database (created by migration 0012) stands in, so runserver and
+# run_jobs still share it; its queries are real database round trips and
+# count against the query budgets like any other.
+CACHE_TABLE = 'portfolio_cache'
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': CACHE_TABLE,
+        }
+    }
+else:
+    raise ImproperlyConfigured("REDIS_URL must be set when DEBUG is off.")
+
+# Cache used for rendered API responses and the content version
+API_CACHE_ALIAS = 'default'
+
+# Seconds a rendered API response is kept (writes invalidate it earlier)
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', str(24 * 60 * 60)))
+
+# Browsers may keep API responses but must revalidate them with the ETag
+API_CACHE_CONTROL = os.getenv('API_CACHE_CONTROL', 'public, max-age=0, must-revalidate')
+
+# Render the home page content server-side instead of leaving it all to
+# client-side fetch calls
+HOME_SSR = os.getenv('HOME_SSR', 'True') == 'True'
+
+# --- METRICS ---
+
+# Per-view latency, query and cache counters, served at /metrics in the
+# Prometheus text format. Numbers are per worker process, labelled with its
+# pid (see portfolio/metrics.py for what that means for totals).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
+# /metrics requires "Authorization: Bearer <token>" and answers 404 while
+# no token is set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Add a Server-Timing header (app, db, github, cloudinary, cache) to responses
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'True') == 'True'
+
+# --- RESPONSE COMPRESSION (portfolio.middleware.CompressionMiddleware) ---
+
+# Content codings offered for cached API payloads, most preferred first.
+# br and zstd need the Brotli/zstandard packages and are skipped without them.
+COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv('COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',') if name.strip()
+]
+
+# --- STATIC SNAPSHOT (portfolio/snapshot.py) ---
+
+# Where `manage.py export_snapshot` writes the exported site. The web
+# processes serve it from here, so it must be shared with the job worker.
+SNAPSHOT_ROOT = os.getenv('SNAPSHOT_ROOT', os.path.join(BASE_DIR, 'snapshot'))
+
+# Re-export automatically (as a background job) after content changes
+SNAPSHOT_ENABLED = os.getenv('SNAPSHOT_ENABLED', 'False') == 'True'
+
+# Serve the snapshot to anonymous visitors instead of rendering the page
+SNAPSHOT_SERVE = os.getenv('SNAPSHOT_SERVE', 'False') == 'True'
+
+# Seconds between the first change and the export, so a burst of writes
+# (a sync, several admin saves) is exported once
+SNAPSHOT_DELAY = int(os.getenv('SNAPSHOT_DELAY', '10'))
+
+# Releases kept on disk, including the current one
+SNAPSHOT_KEEP = int(os.getenv('SNAPSHOT_KEEP', '2'))
+
+# --- BOOT WARM-UP (portfolio/warmup.py) ---
+
+# Open the DB connection and prime the caches with WARMUP_PATHS before a
+# server process (gunicorn worker, uvicorn) takes traffic
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'True') == 'True'
+
+# Pages requested during the warm-up, through the full middleware stack
+WARMUP_PATHS = [
+    path.strip() for path in os.getenv(
+        'WARMUP_PATHS', '/,/api/bootstrap/,/api/profile/,/api/projects/,/api/certificates/,/api/skills/'
+    ).split(',') if path.strip()
+]
+
+# Host header for the warm-up requests (pagination links in the cached
+# payloads use it); defaults to the first ALLOWED_HOSTS entry
+WARMUP_HOST = os.getenv('WARMUP_HOST', '')
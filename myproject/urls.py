@@ -5,7 +5,9 @@ from django.conf.urls.static import static
 from django.shortcuts import render, redirect
 from django.contrib.auth import logout
 from rest_framework.routers import DefaultRouter
-from portfolio.views import ProfileViewSet, ProjectViewSet, CertificateViewSet, SkillViewSet, github_webhook # <--- IMPORT GITHUB_WEBHOOK
+from portfolio import async_views
+from portfolio.budgets import query_budget
+from portfolio.views import ProfileViewSet, ProjectViewSet, CertificateViewSet, SkillViewSet, HomePage, github_webhook, metrics_view # <--- IMPORT GITHUB_WEBHOOK
 
 router = DefaultRouter()
 router.register(r'profile', ProfileViewSet, basename='profile')
@@ -13,13 +15,21 @@ router.register(r'projects', ProjectViewSet)
 router.register(r'certificates', CertificateViewSet)
 router.register(r'skills', SkillViewSet)
 
+@query_budget(5)
 def home_view(request):
-    return render(request, 'index.html', {
+    context = {
         'user': request.user,
         'is_admin': request.user.is_staff if request.user.is_authenticated else False
-    })
+    }
+    # Pre-render the content server-side; sections are cached as fragments
+    # keyed on the content version (the admin toolbar is never cached)
+    if settings.HOME_SSR:
+        context['page'] = HomePage()
+        context['fragment_timeout'] = settings.API_CACHE_TIMEOUT
+    return render(request, 'index.html', context)
 
 # Custom logout to prevent default "Logged Out" page
+@query_budget(3)
 def custom_logout(request):
     logout(request)
     return redirect('/')
@@ -39,4 +49,8 @@ urlpatterns = [
     
     # 5. THE WEBHOOK (Must be here!)
     path('webhook/github/', github_webhook, name='github_webhook'),
+    path('webhook/github/async/', async_views.github_webhook, name='github_webhook_async'),
+
+    # 6. Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
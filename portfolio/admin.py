@@ -1,50 +1,64 @@
 from django.contrib import admin
-from .models import Profile, Project, Certificate, Skill
+from .models import Profile, Project, ProjectLanguage, Certificate, Skill, Tag, Job
 from django import forms
-import cloudinary.uploader
+from . import uploads
 
 class ProfileAdminForm(forms.ModelForm):
     profile_pic_upload = forms.ImageField(required=False, label="Upload New Profile Picture")
     class Meta:
         model = Profile
         fields = '__all__'
-    def clean(self):
-        cleaned_data = super().clean()
-        if self.files.get('profile_pic_upload'):
-            try:
-                res = cloudinary.uploader.upload(self.files.get('profile_pic_upload'), folder='portfolio/profiles', resource_type='image')
-                cleaned_data['profile_pic'] = res['secure_url']
-            except Exception as e: raise forms.ValidationError(f"Upload Failed: {e}")
-        return cleaned_data
 
 class CertificateAdminForm(forms.ModelForm):
     credential_file_upload = forms.FileField(required=False, label="Upload Certificate File")
     class Meta:
         model = Certificate
         fields = '__all__'
-    def clean(self):
-        cleaned_data = super().clean()
-        if self.files.get('credential_file_upload'):
-            try:
-                res = cloudinary.uploader.upload(self.files.get('credential_file_upload'), folder='portfolio/certificates', resource_type='auto')
-                cleaned_data['credential_file'] = res['secure_url']
-            except Exception as e: raise forms.ValidationError(f"Upload Failed: {e}")
-        return cleaned_data
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     form = ProfileAdminForm
     list_display = ('full_name', 'role', 'email')
+    readonly_fields = tuple(uploads.PROFILE_DERIVATIVES)
+
+    def save_model(self, request, obj, form, change):
+        # The upload runs in the background; the save returns immediately
+        super().save_model(request, obj, form, change)
+        if form.files.get('profile_pic_upload'):
+            uploads.start_upload('profile_pic', obj.pk, form.files['profile_pic_upload'])
+            self.message_user(request, "Picture upload started. It will appear once Cloudinary has processed it.")
 
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     form = CertificateAdminForm
     list_display = ('name', 'issuer', 'issue_date')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if form.files.get('credential_file_upload'):
+            uploads.start_upload('credential_file', obj.pk, form.files['credential_file_upload'])
+            self.message_user(request, "File upload started. The credential link updates once it finishes.")
+
+class ProjectLanguageInline(admin.TabularInline):
+    model = ProjectLanguage
+    extra = 0
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ('title', 'stars', 'is_synced')
+    filter_horizontal = ('tags',)
+    inlines = [ProjectLanguageInline]
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category')
\ No newline at end of file
+    list_display = ('name', 'category')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'key', 'status', 'attempts', 'run_after')
+    list_filter = ('status', 'kind')
\ No newline at end of file
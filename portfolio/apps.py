@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class PortfolioConfig(AppConfig):
     name = 'portfolio'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import metrics, signals  # noqa: F401
+
+        # Time every query on every connection, including worker threads
+        connection_created.connect(metrics.install_query_timer, dispatch_uid='portfolio_query_timer')
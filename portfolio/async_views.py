@@ -0,0 +1,135 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+
+from . import search, webhooks
+from .budgets import query_budget
+from .cache import cached_json_response
+from .fastjson import FastJSONRenderer, PlainJSON
+from .models import Profile, Project, Certificate
+from .serializers import ProfileSerializer, ProjectSerializer, CertificateSerializer
+from .views import ProjectViewSet, CertificateViewSet, SkillViewSet, build_bootstrap_payload
+
+# --- ASYNC (ASGI) READ PATH ---
+# Async versions of the public GET endpoints under /api/async/, served by
+# `uvicorn myproject.asgi:application`. Nothing here blocks the event loop
+# while waiting on a client, so one process can hold many slow connections.
+# They share the content version and ETags with the DRF views, and return
+# the same JSON (links in paginated responses point at /api/async/).
+
+
+def read_view(budget):
+    # Wraps a coroutine returning plain data into a cached, GET-only JSON
+    # view with the given query budget (see budgets.py)
+    def decorator(build):
+        return query_budget(budget)(cached_read(build))
+    return decorator
+
+
+def cached_read(build):
+    @require_GET
+    @wraps(build)
+    async def view(request, *args, **kwargs):
+        try:
+            return await cached_json_response(request, lambda: build(request, *args, **kwargs))
+        except APIException as exc:
+            body = FastJSONRenderer().render({'detail': exc.detail})
+            return HttpResponse(body, status=exc.status_code, content_type='application/json')
+    return view
+
+
+async def list_rows(view_class, request):
+    # A DRF view instance used only for its queryset, ?ordering= handling,
+    # ?fields= serializer context, paginator and values() rows; no DRF
+    # request cycle runs. The paginator and the tags lookup evaluate
+    # querysets themselves, so they run on the thread the ORM work uses.
+    view = view_class(request=Request(request), format_kwarg=None, action='list', args=(), kwargs={})
+    return await sync_to_async(view.list_rows)(view.filter_queryset(view.get_queryset()))
+
+
+async def get_or_not_found(queryset, pk):
+    obj = await queryset.filter(pk=pk).afirst()
+    if obj is None:
+        raise NotFound(f"No {queryset.model.__name__} matches the given query.")
+    return obj
+
+
+@read_view(1)
+async def profile(request):
+    return ProfileSerializer(await Profile.objects.afirst()).data
+
+
+@read_view(2)
+async def project_list(request):
+    return await list_rows(ProjectViewSet, request)
+
+
+@read_view(2)
+async def project_detail(request, pk):
+    project = await get_or_not_found(Project.objects.prefetch_related('tags'), pk)
+    return ProjectSerializer(project, context={'request': Request(request)}).data
+
+
+@read_view(1)
+async def certificate_list(request):
+    return await list_rows(CertificateViewSet, request)
+
+
+@read_view(1)
+async def certificate_detail(request, pk):
+    certificate = await get_or_not_found(Certificate.objects.all(), pk)
+    return CertificateSerializer(certificate, context={'request': Request(request)}).data
+
+
+@read_view(1)
+async def skill_list(request):
+    return await list_rows(SkillViewSet, request)
+
+
+@read_view(5)
+async def bootstrap(request):
+    return PlainJSON(await sync_to_async(build_bootstrap_payload)())
+
+
+@read_view(4)
+async def search_view(request):
+    q = request.GET.get('q', '').strip()
+    return {'query': q, 'results': await sync_to_async(search.search)(q) if q else []}
+
+
+@csrf_exempt
+@query_budget(6)
+async def github_webhook(request):
+    # Same checks and responses as views.github_webhook
+    if request.method == 'GET':
+        return HttpResponse('OK', status=200)
+
+    if request.method == 'POST':
+        event_type = request.META.get('HTTP_X_GITHUB_EVENT')
+        if event_type not in webhooks.HANDLED_EVENTS:
+            return JsonResponse({'status': 'ignored', 'message': f'Event {event_type} not handled'})
+
+        if not webhooks.verify_signature(request.body, request.META.get('HTTP_X_HUB_SIGNATURE_256')):
+            return HttpResponse('Invalid signature', status=403)
+
+        if event_type == 'ping':
+            return JsonResponse({'status': 'success', 'message': 'pong'})
+
+        try:
+            # The delivery record and the job INSERT share a transaction,
+            # which the async ORM cannot open, so they run in a thread
+            data, status_code = await sync_to_async(webhooks.queue_event)(
+                event_type, request.META.get('HTTP_X_GITHUB_DELIVERY'), request.body
+            )
+            if data is not None:
+                return JsonResponse(data, status=status_code)
+        except Exception as e:
+            print(f"Webhook Error: {e}")
+            return HttpResponse(str(e), status=400)
+
+    return HttpResponse('Method not allowed', status=405)
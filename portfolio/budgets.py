@@ -0,0 +1,47 @@
+from django.conf import settings
+
+# --- QUERY BUDGETS ---
+# Every view declares the most queries one request may run:
+#   - DRF views: a `query_budgets` dict keyed by action (viewsets) or by
+#     lowercase method (APIView);
+#   - function views: the @query_budget(n) decorator.
+# The test suite asserts them at several data sizes, and MetricsMiddleware
+# warns when a live request goes over (see check_budget).
+
+# A request carrying a session cookie may load the session and the user on
+# top of what the view itself runs
+SESSION_QUERY_ALLOWANCE = 2
+
+
+def query_budget(limit):
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def budget_for(match, method):
+    # Budget of the view a URL resolved to, or None if it declares none
+    if match is None:
+        return None
+    func = match.func
+    budget = getattr(func, 'query_budget', None)
+    if budget is not None:
+        return budget
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    budgets = getattr(view_class, 'query_budgets', None)
+    if not budgets:
+        return None
+    actions = getattr(func, 'actions', None)
+    name = actions.get(method.lower()) if actions else method.lower()
+    return budgets.get(name)
+
+
+def check_budget(request, query_count):
+    # Returns the budget a request exceeded, or None when it stayed within it
+    budget = budget_for(getattr(request, 'resolver_match', None), request.method)
+    if budget is None:
+        return None
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        budget += SESSION_QUERY_ALLOWANCE
+    return budget if query_count > budget else None
@@ -0,0 +1,173 @@
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from .fastjson import FastJSONRenderer
+from .metrics import record_cache
+from .models import Job
+
+# Global content version. Every cached API payload is keyed on it, so
+# bumping it after a write makes all older payloads unreachable at once.
+VERSION_KEY = 'portfolio:content-version'
+
+# Set while an 'export_snapshot' job is waiting to run (see schedule_snapshot)
+SNAPSHOT_SCHEDULED_KEY = 'portfolio:snapshot-scheduled'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_content_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Cold or evicted: start from the clock so the new version is newer
+        # than anything that may still be stored under an older one.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_content_version():
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_content_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_content():
+    # Bumps the version once the current transaction commits. Bumping before
+    # the commit would let a reader cache the old rows under the new version.
+    transaction.on_commit(bump_content_version)
+    if settings.SNAPSHOT_ENABLED:
+        transaction.on_commit(schedule_snapshot)
+
+
+def schedule_snapshot():
+    # Queues one static export per burst of writes (a sync, an admin editing
+    # several rows): only the first change in a SNAPSHOT_DELAY window inserts
+    # a job, due at the end of the window. Pending jobs share a key, so the
+    # queue coalesces any that still pile up (see jobs.claim_next).
+    delay = settings.SNAPSHOT_DELAY
+    if get_cache().add(SNAPSHOT_SCHEDULED_KEY, True, timeout=max(delay, 1)):
+        Job.objects.create(
+            kind='export_snapshot', key='export_snapshot', payload={},
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def path_digest(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def response_cache_key(request, version):
+    return f"portfolio:api:{version}:{path_digest(request)}"
+
+
+def response_etag(request, version):
+    # Strong validator derived from the content version and the URL, so it
+    # can be checked before any serializer or query runs.
+    return f'"{version}-{path_digest(request)[:16]}"'
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    etags = [value.removeprefix('W/') for value in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+def set_validators(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = settings.API_CACHE_CONTROL
+    response['Vary'] = 'Accept'
+    return response
+
+
+def is_cacheable_request(request):
+    # Only plain JSON reads are cached; the browsable API (text/html) and
+    # explicit ?format= overrides always go through DRF.
+    if request.method != 'GET':
+        return False
+    if request.GET.get('format') not in (None, 'json'):
+        return False
+    return 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+
+
+class CachedResponseMixin:
+    # Serves GETs for `cached_actions` straight from the cache as rendered
+    # JSON bytes, with a strong ETag. A revalidation that still matches is
+    # answered 304 after a single cache lookup; a hit costs two lookups. Both
+    # run no queries.
+    cached_actions = ('list', 'retrieve')
+
+    def get_cached_action(self, request):
+        action_map = getattr(self, 'action_map', None)
+        if action_map is None:
+            return request.method.lower()
+        return action_map.get(request.method.lower())
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.get_cached_action(request) not in self.cached_actions or not is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        version = get_content_version()
+        etag = response_etag(request, version)
+        if etag_matches(request, etag):
+            record_cache('not_modified')
+            return set_validators(HttpResponseNotModified(), etag)
+
+        cache = get_cache()
+        key = response_cache_key(request, version)
+        content = cache.get(key)
+        if content is not None:
+            record_cache('hit')
+            return set_validators(HttpResponse(content, content_type='application/json'), etag)
+
+        record_cache('miss')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and getattr(response, 'accepted_media_type', None) == 'application/json':
+            response.render()
+            cache.set(key, response.content, timeout=settings.API_CACHE_TIMEOUT)
+            set_validators(response, etag)
+        return response
+
+
+async def cached_json_response(request, build):
+    # Async counterpart of CachedResponseMixin for the ASGI views: same ETag
+    # scheme, checked through the async cache API. `build` is a coroutine
+    # function returning the data to render and only runs on a miss.
+    version = await aget_content_version()
+    etag = response_etag(request, version)
+    if etag_matches(request, etag):
+        record_cache('not_modified')
+        return set_validators(HttpResponseNotModified(), etag)
+
+    cache = get_cache()
+    key = response_cache_key(request, version)
+    content = await cache.aget(key)
+    record_cache('miss' if content is None else 'hit')
+    if content is None:
+        content = FastJSONRenderer().render(await build())
+        await cache.aset(key, content, timeout=settings.API_CACHE_TIMEOUT)
+    return set_validators(HttpResponse(content, content_type='application/json'), etag)
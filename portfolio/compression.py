@@ -0,0 +1,68 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- RESPONSE COMPRESSION CODECS ---
+# Used by middleware.CompressionMiddleware. Compressed bodies are cached per
+# ETag, so each payload is compressed once per content version and the
+# levels can be higher than a per-request compressor could afford.
+
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 9
+GZIP_LEVEL = 6
+
+
+def compress_br(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def compress_zstd(data):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def compress_gzip(data):
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+CODECS = {'gzip': compress_gzip}
+if brotli is not None:
+    CODECS['br'] = compress_br
+if zstandard is not None:
+    CODECS['zstd'] = compress_zstd
+
+
+def parse_accept_encoding(header):
+    # {coding: q} from an Accept-Encoding header; malformed q-values count as 0
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip().lower()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header, preference):
+    # First coding in `preference` (server order) that the client accepts
+    # and this process can produce, or None
+    accepted = parse_accept_encoding(header or '')
+    for encoding in preference:
+        if encoding in CODECS and accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
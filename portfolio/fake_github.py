@@ -0,0 +1,179 @@
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- LOCAL GITHUB STUB ---
+# A tiny in-process stand-in for the parts of the GitHub REST API the sync
+# uses (user repo list and languages_url), for benchmarks and tests. It
+# serves ETags and answers If-None-Match with 304, pages the repo list like
+# GitHub (per_page up to 100 plus a Link header), can add latency to every
+# response, sends X-RateLimit-* headers and answers 403 once the request
+# budget is spent, and can throttle requests with Retry-After.
+
+BASE_PUSHED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+LANGUAGES = ({'Python': 12000, 'HTML': 3000}, {'JavaScript': 8000, 'CSS': 2000}, {'Go': 5000, 'Dockerfile': 200})
+
+
+class FakeGitHub:
+    def __init__(self, repos=10, username='bench', latency=0.0, rate_limit=None):
+        self.repos = repos
+        self.username = username
+        self.latency = latency
+        # Number of full (non-304) responses served before every further
+        # request is refused with 403; None means unlimited
+        self.rate_limit = rate_limit
+        self.rate_limit_reset = int(time.time()) + 3600
+        # The next `throttle` requests get a 429 with Retry-After: throttle_wait
+        self.throttle = 0
+        self.throttle_wait = 0
+        self.pushed_at = {}
+        self.hits = Counter()
+        # Requests that carried an Authorization header
+        self.authorized = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    # --- DATA ---
+    def repo_name(self, index):
+        return f"repo-{index}"
+
+    def html_url(self, index):
+        return f"https://github.com/{self.username}/{self.repo_name(index)}"
+
+    def repo(self, index):
+        return {
+            'name': self.repo_name(index),
+            'html_url': self.html_url(index),
+            'description': f"Benchmark repository {index}",
+            'stargazers_count': index % 50,
+            'languages_url': f"{self.url}/repos/{self.username}/{self.repo_name(index)}/languages",
+            'pushed_at': self.pushed_at.get(index, BASE_PUSHED_AT).isoformat().replace('+00:00', 'Z'),
+        }
+
+    def languages(self, index):
+        return LANGUAGES[index % len(LANGUAGES)]
+
+    def touch(self, indexes):
+        # Simulates pushes: those repos get a new pushed_at
+        now = datetime.now(timezone.utc)
+        for index in indexes:
+            self.pushed_at[index] = now
+
+    def push_payload(self, index):
+        repo = self.repo(index)
+        repo['pushed_at'] = int(time.time())
+        return {'ref': 'refs/heads/main', 'repository': repo, 'pusher': {'name': self.username}}
+
+    # --- SERVER ---
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        handler = type('FakeGitHubHandler', (FakeGitHubHandler,), {'github': self})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, path):
+        # Returns (kind, body, extra headers) or None for unknown paths
+        parsed = urlparse(path)
+        parts = parsed.path.strip('/').split('/')
+        if parts[:1] == ['users'] and parts[2:] == ['repos']:
+            query = parse_qs(parsed.query)
+            per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+            page = max(int(query.get('page', ['1'])[0]), 1)
+            start = (page - 1) * per_page
+            body = [self.repo(index) for index in range(start, min(start + per_page, self.repos))]
+            headers = {}
+            if start + per_page < self.repos:
+                last = (self.repos + per_page - 1) // per_page
+                base = f"{self.url}{parsed.path}?per_page={per_page}"
+                headers['Link'] = f'<{base}&page={page + 1}>; rel="next", <{base}&page={last}>; rel="last"'
+            return 'list', body, headers
+        if parts[:1] == ['repos'] and parts[3:] == ['languages']:
+            index = int(parts[2].rsplit('-', 1)[1])
+            if index >= self.repos:
+                return None
+            return 'languages', self.languages(index), {}
+        return None
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    github = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        github = self.github
+        if github.latency:
+            time.sleep(github.latency)
+
+        route = github.route(self.path)
+        if route is None:
+            return self.send_json(404, {'message': 'Not Found'})
+        kind, body, headers = route
+
+        content = json.dumps(body).encode()
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+        with github.lock:
+            github.hits[kind] += 1
+            if self.headers.get('Authorization'):
+                github.authorized += 1
+            if github.throttle > 0:
+                github.throttle -= 1
+                github.hits['throttled'] += 1
+                return self.send_json(429, {'message': 'Secondary rate limit'}, {'Retry-After': str(github.throttle_wait)})
+            limit_headers = {}
+            if github.rate_limit is not None:
+                used = github.hits['full']
+                limit_headers = {
+                    'X-RateLimit-Limit': str(github.rate_limit),
+                    'X-RateLimit-Remaining': str(max(github.rate_limit - used, 0)),
+                    'X-RateLimit-Reset': str(github.rate_limit_reset),
+                }
+            # Like GitHub, 304 answers do not count against the limit
+            if self.headers.get('If-None-Match') == etag:
+                github.hits['not_modified'] += 1
+                return self.send_json(304, None, dict(limit_headers, ETag=etag))
+            if github.rate_limit is not None and github.hits['full'] >= github.rate_limit:
+                github.hits['rate_limited'] += 1
+                return self.send_json(403, {'message': 'API rate limit exceeded'}, limit_headers)
+            github.hits['full'] += 1
+            if limit_headers:
+                limit_headers['X-RateLimit-Remaining'] = str(github.rate_limit - github.hits['full'])
+
+        self.send_json(200, content, dict(headers, ETag=etag, **limit_headers))
+
+    def send_json(self, status, body, headers=None):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
@@ -0,0 +1,50 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- FAST JSON ENCODING ---
+# The values() fast path (see serializers.py) builds payloads out of dict,
+# list, str, int, bool and None only. For those, orjson writes exactly the
+# bytes DRF's JSONRenderer does (compact, UTF-8, same string escapes) apart
+# from U+2028/U+2029, which DRF escapes for JavaScript and so do we. Without
+# orjson the stdlib encoder is called with DRF's own arguments.
+
+
+class PlainJSON:
+    # Marks data that is safe for dumps(); anything else keeps going through
+    # DRF's encoder, which knows about dates, decimals, lazy strings, etc.
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+def escape_line_separators(content):
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def dumps(data):
+    if orjson is not None:
+        try:
+            return escape_line_separators(orjson.dumps(data))
+        except orjson.JSONEncodeError:
+            # e.g. lone surrogates or integers over 64 bits
+            pass
+    content = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return escape_line_separators(content.encode())
+
+
+class FastJSONRenderer(JSONRenderer):
+    # Drop-in JSONRenderer: PlainJSON payloads take the fast encoder, the
+    # rest (and any ?indent= request) renders exactly as before
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, PlainJSON):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data.data, accepted_media_type, renderer_context)
+        return dumps(data.data)
@@ -0,0 +1,310 @@
+import math
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.dateparse import parse_datetime
+
+from .metrics import track_outbound
+from .models import GitHubSyncState
+
+# Result of a (possibly conditional) languages_url fetch
+LanguagesResult = namedtuple('LanguagesResult', ['status_code', 'data', 'error', 'etag', 'last_modified'])
+
+# Result of listing a user's repositories across every page
+ReposResult = namedtuple('ReposResult', ['status_code', 'repos', 'etag', 'last_modified', 'pages'])
+
+# Rate limit state shared by every process through the API cache
+RATE_LIMIT_KEY = 'portfolio:github-rate-limit'
+
+
+class RateLimited(Exception):
+    # Raised instead of sending a request the rate limit has no room for, or
+    # when GitHub asks to wait longer than GITHUB_MAX_RETRY_WAIT
+    def __init__(self, reset_at):
+        self.reset_at = reset_at
+        super().__init__(f"GitHub rate limit reached, resets at {reset_at:%H:%M:%S} UTC")
+
+
+# --- RATE LIMIT BUDGET ---
+class RateLimitBudget:
+    # Tracks X-RateLimit-Remaining/Reset from every response. Each request
+    # takes one unit up front, so concurrent fetches cannot overshoot, and
+    # the responses lower the count to GitHub's. A 304 (free on GitHub's
+    # side) does not give its unit back until the window resets. The count
+    # is kept in memory while a session runs and shared with other
+    # processes once, when it closes (see close_session).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = None
+        self.changed = False
+
+    def get_cache(self):
+        return caches[settings.API_CACHE_ALIAS]
+
+    def refresh(self):
+        # Picks up what other processes learned since this one last asked
+        stored = self.get_cache().get(RATE_LIMIT_KEY)
+        with self.lock:
+            if stored is not None:
+                self.remaining, self.reset_at = stored
+            self.changed = False
+            self.expire()
+
+    def publish(self):
+        # One cache write, outside the lock, and only if a response moved the
+        # count since the last refresh or publish
+        with self.lock:
+            if not self.changed or self.reset_at is None:
+                return
+            self.changed = False
+            stored = (self.remaining, self.reset_at)
+        timeout = max(int(self.reset_at.timestamp() - time.time()), 1)
+        self.get_cache().set(RATE_LIMIT_KEY, stored, timeout=timeout)
+
+    def clear(self):
+        with self.lock:
+            self.remaining = None
+            self.reset_at = None
+            self.changed = False
+        self.get_cache().delete(RATE_LIMIT_KEY)
+
+    def expire(self):
+        if self.reset_at is not None and datetime.now(timezone.utc) >= self.reset_at:
+            self.remaining = None
+            self.reset_at = None
+
+    def available(self):
+        # Requests that can still be sent in this window; None when unknown
+        with self.lock:
+            self.expire()
+            if self.remaining is None:
+                return None
+            return max(self.remaining - settings.GITHUB_RATE_LIMIT_RESERVE, 0)
+
+    def acquire(self):
+        with self.lock:
+            self.expire()
+            if self.remaining is None:
+                return
+            if self.remaining <= settings.GITHUB_RATE_LIMIT_RESERVE:
+                raise RateLimited(self.reset_at)
+            self.remaining -= 1
+
+    def update(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        reset_at = datetime.fromtimestamp(int(reset), tz=timezone.utc)
+        with self.lock:
+            # Concurrent responses arrive out of order; within one window the
+            # count only goes down, so an older, higher count is ignored
+            if reset_at == self.reset_at and self.remaining is not None:
+                self.remaining = min(self.remaining, int(remaining))
+            else:
+                self.remaining = int(remaining)
+            self.reset_at = reset_at
+            self.changed = True
+
+
+rate_limit = RateLimitBudget()
+
+
+# --- SHARED HTTP SESSION ---
+def build_session():
+    # One keep-alive session for the whole sync. The pool is sized to the
+    # concurrency limit so every worker thread can reuse a warm connection
+    # instead of paying a new TCP/TLS handshake per repository. requests is
+    # imported here: web processes only need it when a sync runs.
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = settings.GITHUB_SYNC_CONCURRENCY
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept'] = 'application/vnd.github+json'
+    session.headers['X-GitHub-Api-Version'] = '2022-11-28'
+    # No session-wide Authorization header: request() adds the token per
+    # call, and only for GITHUB_API_URL
+    rate_limit.refresh()
+    return session
+
+
+def close_session(session):
+    # Ends a batch of requests: what it learned about the rate limit is
+    # shared with other processes in a single cache write
+    try:
+        rate_limit.publish()
+    finally:
+        session.close()
+
+
+def is_api_url(url):
+    # True when `url` has the scheme and host of GITHUB_API_URL. Only those
+    # requests carry the token and feed the rate limit budget; URLs taken
+    # from webhook payloads must pass this check before they are fetched.
+    api = urlsplit(settings.GITHUB_API_URL)
+    target = urlsplit(url or '')
+    return (target.scheme.lower(), target.netloc.lower()) == (api.scheme.lower(), api.netloc.lower())
+
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date; None when
+    # it is neither
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(math.ceil(moment.timestamp() - time.time()), 0)
+
+
+def retry_delay(response):
+    # Seconds GitHub wants us to wait, or None if this is not a rate limit answer
+    if response.status_code not in (403, 429):
+        return None
+    if response.headers.get('Retry-After'):
+        delay = parse_retry_after(response.headers['Retry-After'])
+        if delay is not None:
+            return delay
+    if response.headers.get('X-RateLimit-Remaining') == '0' and response.headers.get('X-RateLimit-Reset'):
+        return max(int(response.headers['X-RateLimit-Reset']) - int(time.time()), 0)
+    return None
+
+
+def request(session, url, headers=None):
+    # Every GitHub call goes through here: it spends from the rate limit
+    # budget, waits out short Retry-After answers and turns longer ones into
+    # RateLimited so the caller can defer the work.
+    trusted = is_api_url(url)
+    headers = dict(headers or {})
+    if trusted and settings.GITHUB_TOKEN:
+        headers['Authorization'] = f'Bearer {settings.GITHUB_TOKEN}'
+    while True:
+        rate_limit.acquire()
+        with track_outbound('github'):
+            response = session.get(url, headers=headers, timeout=settings.GITHUB_REQUEST_TIMEOUT)
+        if trusted:
+            rate_limit.update(response)
+
+        delay = retry_delay(response)
+        if delay is None:
+            return response
+        if delay > settings.GITHUB_MAX_RETRY_WAIT:
+            raise RateLimited(datetime.fromtimestamp(time.time() + delay, tz=timezone.utc))
+        time.sleep(delay)
+
+
+# --- CONDITIONAL REQUESTS ---
+# GitHub does not count 304 Not Modified answers against the rate limit, so
+# every request carries the validators from the previous response.
+def conditional_headers(state):
+    headers = {}
+    if state is not None:
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+    return headers
+
+
+def parse_pushed_at(value):
+    # The REST API sends ISO 8601 strings, push webhooks send epoch seconds
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    return parse_datetime(value)
+
+
+def load_states(urls):
+    return {state.url: state for state in GitHubSyncState.objects.filter(url__in=urls)}
+
+
+def save_states(states):
+    # Upserts a batch of GitHubSyncState rows in one statement
+    if not states:
+        return
+    GitHubSyncState.objects.bulk_create(
+        states,
+        update_conflicts=True,
+        unique_fields=['url'],
+        update_fields=['etag', 'last_modified', 'pushed_at', 'updated_at'],
+    )
+
+
+def repos_url(username):
+    return f"{settings.GITHUB_API_URL}/users/{username}/repos?per_page=100&sort=pushed&direction=desc"
+
+
+def get_user_repos(session, username, state=None):
+    # Page 1 is conditional. On a 304 nothing else is fetched; otherwise the
+    # Link header is followed to the last page. Raises unless 200/304.
+    # Page 1's ETag only covers page 1 (star changes and deletions further
+    # down leave it as is), so callers should keep validators only for
+    # single-page listings (see `pages`).
+    response = request(session, repos_url(username), conditional_headers(state))
+    if response.status_code == 304:
+        return ReposResult(304, [], state.etag if state else '', state.last_modified if state else '', 1)
+    response.raise_for_status()
+
+    repos = response.json()
+    first = response
+    pages = 1
+    next_url = response.links.get('next', {}).get('url')
+    while next_url:
+        response = request(session, next_url)
+        response.raise_for_status()
+        repos.extend(response.json())
+        pages += 1
+        next_url = response.links.get('next', {}).get('url')
+    return ReposResult(200, repos, first.headers.get('ETag', ''), first.headers.get('Last-Modified', ''), pages)
+
+
+def fetch_languages(session, languages_url, state=None):
+    # Errors (including RateLimited) are returned rather than raised so one
+    # bad repository never aborts the whole batch.
+    try:
+        response = request(session, languages_url, conditional_headers(state))
+        data = response.json() if response.status_code == 200 else {}
+        return LanguagesResult(
+            response.status_code,
+            data,
+            None,
+            response.headers.get('ETag', ''),
+            response.headers.get('Last-Modified', ''),
+        )
+    except Exception as e:
+        return LanguagesResult(None, {}, e, '', '')
+
+
+def fetch_all_languages(session, requests_to_make):
+    # requests_to_make is a list of (languages_url, state) pairs. Fetches run
+    # over a bounded thread pool and results come back in input order so
+    # callers behave exactly like the old serial loop.
+    if not requests_to_make:
+        return []
+    workers = max(1, min(settings.GITHUB_SYNC_CONCURRENCY, len(requests_to_make)))
+    # Each fetch runs in a copy of the caller's context so its timing is
+    # added to the request's Server-Timing header
+    contexts = [copy_context() for _ in requests_to_make]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(
+            lambda context, item: context.run(fetch_languages, session, *item),
+            contexts, requests_to_make,
+        ))
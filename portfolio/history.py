@@ -0,0 +1,125 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ProjectHistory, ProjectLanguage, ProjectSample
+from .serializers import format_datetime
+
+# --- STAR AND LANGUAGE HISTORY ---
+# Every sync appends one ProjectSample per project (stars plus the
+# {language: bytes} it just saved) and writes the same values into the
+# project's current hour, day and week ProjectHistory buckets, where the
+# last sample of a bucket wins. The rollups are what /history/ reads, so a
+# year is ~365 daily rows instead of every raw sample. `prune` (run by
+# `manage.py run_jobs`) drops samples and finer rollups past their
+# retention; weekly rollups are kept for good.
+
+# Resolution -> bucket length, finest first
+RESOLUTIONS = {
+    ProjectHistory.HOUR: timedelta(hours=1),
+    ProjectHistory.DAY: timedelta(days=1),
+    ProjectHistory.WEEK: timedelta(weeks=1),
+}
+
+
+def retention(resolution):
+    # How far back a resolution's buckets go, or None for forever
+    days = {
+        ProjectHistory.HOUR: settings.HISTORY_HOURLY_RETENTION_DAYS,
+        ProjectHistory.DAY: settings.HISTORY_DAILY_RETENTION_DAYS,
+    }.get(resolution)
+    return timedelta(days=days) if days is not None else None
+
+
+def bucket_start(moment, resolution):
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if resolution == ProjectHistory.HOUR:
+        return moment
+    moment = moment.replace(hour=0)
+    if resolution == ProjectHistory.DAY:
+        return moment
+    return moment - timedelta(days=moment.weekday())
+
+
+# --- WRITES ---
+def record_samples(projects, now=None):
+    # Samples every project in the `projects` queryset as it is in the
+    # database now (call after the sync's writes, in its transaction). Four
+    # queries however many projects there are. Returns the number sampled.
+    now = now or timezone.now()
+    stars = dict(projects.values_list('id', 'stars'))
+    if not stars:
+        return 0
+    languages = {project_id: {} for project_id in stars}
+    rows = ProjectLanguage.objects.filter(project_id__in=list(stars)).values_list('project_id', 'skill__name', 'bytes')
+    for project_id, name, size in rows:
+        languages[project_id][name] = size
+
+    ProjectSample.objects.bulk_create([
+        ProjectSample(project_id=project_id, recorded_at=now, stars=count, languages=languages[project_id])
+        for project_id, count in stars.items()
+    ])
+    ProjectHistory.objects.bulk_create(
+        [
+            ProjectHistory(
+                project_id=project_id, resolution=resolution, bucket=bucket_start(now, resolution),
+                stars=count, languages=languages[project_id], recorded_at=now,
+            )
+            for project_id, count in stars.items()
+            for resolution in RESOLUTIONS
+        ],
+        update_conflicts=True,
+        unique_fields=['project', 'resolution', 'bucket'],
+        update_fields=['stars', 'languages', 'recorded_at'],
+    )
+    return len(stars)
+
+
+def delete_for_projects(projects):
+    # For raw deletes of projects (sync.sweep_projects), which skip cascades
+    ProjectSample.objects.filter(project__in=projects).delete()
+    ProjectHistory.objects.filter(project__in=projects).delete()
+
+
+def prune(now=None):
+    # One DELETE per table/resolution; returns the number of rows removed
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.HISTORY_SAMPLE_RETENTION_DAYS)
+    deleted = ProjectSample.objects.filter(recorded_at__lt=cutoff).delete()[0]
+    for resolution in RESOLUTIONS:
+        keep = retention(resolution)
+        if keep is not None:
+            deleted += ProjectHistory.objects.filter(resolution=resolution, bucket__lt=now - keep).delete()[0]
+    return deleted
+
+
+# --- READS ---
+def pick_resolution(days):
+    # Finest resolution that still holds `days` of history in at most
+    # HISTORY_MAX_POINTS rows
+    span = timedelta(days=days)
+    for resolution, step in RESOLUTIONS.items():
+        keep = retention(resolution)
+        if (keep is None or span <= keep) and span / step <= settings.HISTORY_MAX_POINTS:
+            return resolution
+    return ProjectHistory.WEEK
+
+
+def project_history(project_id, days, resolution=None, now=None):
+    # Plain JSON data for /api/projects/{id}/history/, one query
+    now = now or timezone.now()
+    resolution = resolution or pick_resolution(days)
+    since = bucket_start(now - timedelta(days=days), resolution)
+    points = ProjectHistory.objects.filter(
+        project_id=project_id, resolution=resolution, bucket__gte=since,
+    ).order_by('bucket').values_list('bucket', 'stars', 'languages')
+    return {
+        'project': project_id,
+        'resolution': resolution,
+        'since': format_datetime(since),
+        'points': [
+            {'time': format_datetime(bucket), 'stars': stars, 'languages': languages}
+            for bucket, stars, languages in points
+        ],
+    }
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import github, snapshot, sync, uploads
+from .models import Job
+
+# kind -> callable(payload). Every handler must be safe to run twice.
+HANDLERS = {
+    'github_push': sync.sync_pushed_repository,
+    'github_delete': sync.delete_repository,
+    'github_languages': sync.sync_repository_languages,
+    'export_snapshot': snapshot.export_job,
+    'upload': uploads.run_upload,
+}
+
+
+def enqueue(kind, key, payload, run_after=None):
+    # A single INSERT, cheap enough to do inside a webhook request
+    return Job.objects.create(
+        kind=kind,
+        key=key,
+        payload=payload,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def claim(pk):
+    # Claims one job by id for a process that runs it itself (uploads.py);
+    # None when run_jobs got to it first
+    if not Job.objects.filter(pk=pk, status=Job.PENDING).update(status=Job.RUNNING, locked_at=timezone.now()):
+        return None
+    return Job.objects.get(pk=pk)
+
+
+def requeue_stale():
+    # Jobs left 'running' by a worker that died are handed back to the queue
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(status=Job.PENDING, locked_at=None)
+
+
+def claim_next():
+    # Claims the oldest due job together with every other pending job for
+    # the same key. Only the newest one is run, the rest are superseded by it
+    # (e.g. ten pushes to one repository become a single sync).
+    now = timezone.now()
+    with transaction.atomic():
+        first = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING, run_after__lte=now)
+            .order_by('id')
+            .first()
+        )
+        if first is None:
+            return None, 0
+
+        group = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING, key=first.key)
+            .order_by('id')
+        )
+        latest = group[-1]
+        superseded = [job.pk for job in group[:-1]]
+        if superseded:
+            Job.objects.filter(pk__in=superseded).update(
+                status=Job.DONE, last_error=f"Coalesced into job #{latest.pk}"
+            )
+        Job.objects.filter(pk=latest.pk).update(status=Job.RUNNING, locked_at=now)
+        latest.status = Job.RUNNING
+    return latest, len(superseded)
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+        handler(job.payload)
+    except github.RateLimited as e:
+        # Not a failure: run again once the rate limit window resets
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.PENDING, locked_at=None, last_error=str(e), run_after=e.reset_at,
+        )
+        print(f"Job #{job.pk} ({job.kind}) deferred: {e}")
+        return False
+    except Exception as e:
+        attempts = job.attempts + 1
+        if attempts >= settings.JOB_MAX_ATTEMPTS:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, attempts=attempts, locked_at=None, last_error=str(e)
+            )
+            print(f"Job #{job.pk} ({job.kind}) failed permanently: {e}")
+        else:
+            # Exponential backoff: base, 2*base, 4*base, ...
+            delay = settings.JOB_RETRY_BACKOFF * (2 ** (attempts - 1))
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.PENDING,
+                attempts=attempts,
+                locked_at=None,
+                last_error=str(e),
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+            print(f"Job #{job.pk} ({job.kind}) failed, retrying in {delay}s: {e}")
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, locked_at=None, last_error='')
+    return True
+
+
+def run_pending(limit=None):
+    # Drains due jobs until the queue is empty (or `limit` runs).
+    # Returns (ran, coalesced).
+    requeue_stale()
+    ran = 0
+    coalesced = 0
+    while limit is None or ran < limit:
+        job, superseded = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+        coalesced += superseded
+    return ran, coalesced
@@ -0,0 +1,297 @@
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import ExitStack, redirect_stdout
+from datetime import date, datetime, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from portfolio import github as github_api, jobs, metrics, webhooks
+from portfolio.cache import get_cache
+from portfolio.fake_github import FakeGitHub
+from portfolio.models import Profile, Project, Certificate, Skill, Tag, GitHubSyncState, Job, WebhookDelivery
+
+SCENARIOS = ('api', 'sync', 'webhook')
+
+# Secret the webhook scenario signs its deliveries with
+WEBHOOK_SECRET = 'benchmark'
+
+# (name, path) pairs timed by the api scenario
+API_ENDPOINTS = (
+    ('api.projects', '/api/projects/'),
+    ('api.projects.by_stars', '/api/projects/?ordering=-stars'),
+    ('api.projects.by_tag', '/api/projects/?tag=Django'),
+    ('api.certificates', '/api/certificates/'),
+    ('api.skills', '/api/skills/?ordering=-bytes'),
+    ('api.profile', '/api/profile/'),
+    ('api.bootstrap', '/api/bootstrap/'),
+    ('api.search', '/api/search/?q=benchmark%20python'),
+)
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(name, size, latencies, queries, extra=None):
+    latencies_ms = sorted(value * 1000 for value in latencies)
+    total = sum(latencies)
+    result = {
+        'scenario': name,
+        'size': size,
+        'iterations': len(latencies),
+        'latency_ms': {
+            'min': round(latencies_ms[0], 3),
+            'p50': round(percentile(latencies_ms, 50), 3),
+            'p90': round(percentile(latencies_ms, 90), 3),
+            'p99': round(percentile(latencies_ms, 99), 3),
+            'max': round(latencies_ms[-1], 3),
+            'mean': round(total * 1000 / len(latencies), 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries), 'mean': round(sum(queries) / len(queries), 2)},
+        'throughput_rps': round(len(latencies) / total, 2) if total else None,
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def timed(fn):
+    # Runs fn once; returns (seconds, queries, result). Queries are counted
+    # like metrics.timed_query does: everything but transaction SQL.
+    with CaptureQueriesContext(connection) as captured:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(metrics.is_view_query(query['sql']) for query in captured), result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API, GitHub sync and webhook paths against a local fake GitHub, "
+        "on a throwaway test database. Prints (or writes) JSON that can be diffed between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000',
+                            help="Comma-separated numbers of projects/repositories to seed (e.g. 10,1000,10000).")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+        parser.add_argument('--iterations', type=int, default=20, help="Requests per API endpoint and cache state.")
+        parser.add_argument('--webhooks', type=int, default=50, help="Push deliveries sent per size.")
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help="Seconds the fake GitHub waits before every response.")
+        parser.add_argument('--rate-limit', type=int, default=None,
+                            help="Full GitHub responses allowed before the fake answers 403 (adds a sync.rate_limited run).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the seeded data and webhook order.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--use-current-database', action='store_true',
+                            help="Run on the configured database instead of a fresh test one. "
+                                 "Its portfolio data is DELETED; meant for the test suite.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+        scenarios = [name for name in options['scenarios'].split(',') if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        self.options = options
+        self.random = random.Random(options['seed'])
+
+        results = []
+        with ExitStack() as stack:
+            # Never touch the real database: everything runs on a fresh test DB
+            if not options['use_current_database']:
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                stack.callback(connection.creation.destroy_test_db, old_name, verbosity=0)
+            # The sync code prints progress; keep stdout for the JSON report
+            stack.enter_context(redirect_stdout(sys.stderr))
+            self.github = stack.enter_context(FakeGitHub(latency=options['latency']))
+            # Nor the real cache: the scenarios clear it between runs, which
+            # would wipe a shared Redis (responses, content version, GitHub
+            # rate limit) of the site the command runs next to
+            stack.enter_context(override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+                ALLOWED_HOSTS=['testserver'],
+                GITHUB_API_URL=self.github.url,
+                GITHUB_USERNAME=self.github.username,
+                GITHUB_WEBHOOK_SECRET=WEBHOOK_SECRET,
+                DEBUG=False,
+            ))
+            for size in sizes:
+                for scenario in scenarios:
+                    self.reset()
+                    results.extend(getattr(self, f'run_{scenario}')(size))
+                    self.stderr.write(f"  {scenario} @ {size}: done")
+
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in (
+                    'sizes', 'scenarios', 'iterations', 'webhooks', 'latency', 'rate_limit', 'seed'
+                )},
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(f"Wrote {len(results)} results to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    # --- DATA ---
+    def reset(self):
+        for model in (Job, WebhookDelivery, GitHubSyncState, Project, Certificate, Skill, Tag, Profile):
+            model.objects.all().delete()
+        get_cache().clear()
+        github_api.rate_limit.clear()
+        self.github.pushed_at.clear()
+        self.github.hits.clear()
+        self.github.rate_limit = None
+
+    def seed(self, size):
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True, 'is_superuser': True})
+        Profile.objects.create(user=user, full_name='Bench Mark', bio='Benchmark profile', email='bench@example.com')
+
+        tags = Tag.objects.bulk_create([Tag(name=name) for name in ('GitHub', 'Project', 'Django', 'Python', 'React')])
+        Skill.objects.bulk_create([
+            Skill(name=name, category=category)
+            for name, category in (('Python', 'Backend'), ('JavaScript', 'Frontend'), ('Docker', 'Tools'))
+        ])
+        projects = Project.objects.bulk_create([
+            Project(
+                github_url=self.github.html_url(index),
+                title=self.github.repo_name(index),
+                description=f"Benchmark project {index} written in python",
+                stars=self.random.randint(0, 500),
+            )
+            for index in range(size)
+        ])
+        Through = Project.tags.through
+        Through.objects.bulk_create([
+            Through(project_id=project.id, tag_id=tag.id)
+            for project in projects
+            for tag in self.random.sample(tags, 2)
+        ])
+        Certificate.objects.bulk_create([
+            Certificate(name=f"Certificate {index}", issuer='Bench', issue_date=date(2024, 1 + index % 12, 1))
+            for index in range(max(1, size // 10))
+        ])
+        return user
+
+    # --- SCENARIOS ---
+    def run_api(self, size):
+        self.seed(size)
+        client = Client()
+        results = []
+        for name, path in API_ENDPOINTS:
+            for state in ('cold', 'warm'):
+                latencies, queries = [], []
+                for _ in range(self.options['iterations']):
+                    if state == 'cold':
+                        get_cache().clear()
+                    elapsed, count, response = timed(lambda: client.get(path, HTTP_ACCEPT='application/json'))
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} answered {response.status_code}")
+                    latencies.append(elapsed)
+                    queries.append(count)
+                results.append(summarize(f'{name}.{state}', size, latencies, queries))
+        return results
+
+    def run_sync(self, size):
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True, 'is_superuser': True})
+        client = Client()
+        client.force_login(user)
+        self.github.repos = size
+        results = []
+
+        def sync(name):
+            self.github.hits.clear()
+            elapsed, count, response = timed(lambda: client.get('/api/projects/sync_all_github/'))
+            if response.status_code != 200:
+                raise CommandError(f"sync_all_github answered {response.status_code}: {response.content[:200]!r}")
+            results.append(summarize(name, size, [elapsed], [count], {
+                'github_requests': dict(self.github.hits),
+                'projects': Project.objects.count(),
+                'deferred_jobs': Job.objects.filter(kind='github_languages').count(),
+            }))
+
+        sync('sync.cold')
+        sync('sync.unchanged')
+        self.github.touch(self.random.sample(range(size), max(1, size // 10)))
+        sync('sync.partial')
+        if self.options['rate_limit'] is not None:
+            GitHubSyncState.objects.all().delete()
+            Job.objects.all().delete()
+            github_api.rate_limit.clear()
+            self.github.pushed_at.clear()
+            self.github.rate_limit = self.options['rate_limit']
+            sync('sync.rate_limited')
+        return results
+
+    def run_webhook(self, size):
+        self.github.repos = size
+        client = Client()
+        latencies, queries = [], []
+        for delivery in range(self.options['webhooks']):
+            payload = json.dumps(self.github.push_payload(self.random.randrange(size)))
+            elapsed, count, response = timed(lambda: client.post(
+                '/webhook/github/', data=payload, content_type='application/json',
+                HTTP_X_GITHUB_EVENT='push', HTTP_X_GITHUB_DELIVERY=f'bench-{size}-{delivery}',
+                HTTP_X_HUB_SIGNATURE_256=webhooks.sign(payload.encode(), WEBHOOK_SECRET),
+            ))
+            if response.status_code != 202:
+                raise CommandError(f"github_webhook answered {response.status_code}")
+            latencies.append(elapsed)
+            queries.append(count)
+        results = [summarize('webhook.enqueue', size, latencies, queries)]
+
+        self.github.hits.clear()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            ran, coalesced = jobs.run_pending()
+        elapsed = time.perf_counter() - start
+        results.append({
+            'scenario': 'webhook.drain',
+            'size': size,
+            'iterations': self.options['webhooks'],
+            'jobs_run': ran,
+            'jobs_coalesced': coalesced,
+            'seconds': round(elapsed, 4),
+            'queries': len(captured),
+            'throughput_rps': round(self.options['webhooks'] / elapsed, 2) if elapsed else None,
+            'github_requests': dict(self.github.hits),
+        })
+        return results
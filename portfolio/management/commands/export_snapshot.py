@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the anonymous home page and the profile/projects/certificates/skills JSON as "
+        "precompressed static files with hashed names (see SNAPSHOT_* settings)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', help="Directory to export to (default: SNAPSHOT_ROOT).")
+
+    def handle(self, *args, **options):
+        manifest = snapshot.export_snapshot(options['root'])
+        for name, url in manifest['files'].items():
+            self.stdout.write(f"{name}: {url}")
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Heavy clients that should only be imported when they are used (uploads);
+# the report flags them if a server process loads them at boot. requests is
+# not listed: rest_framework.compat imports it whenever it is installed.
+LAZY_MODULES = ('cloudinary',)
+
+# Runs in a fresh interpreter: loads the app the way a server process does
+# (WSGI module, then the URLconf that Django resolves on the first request),
+# optionally times the first and second request to a path, and prints the
+# timings as JSON on stdout. `python -X importtime` writes to stderr.
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from myproject.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+timings = {'boot': time.perf_counter() - start}
+if sys.argv[1]:
+    from portfolio import warmup
+    for name in ('first_request', 'second_request'):
+        start = time.perf_counter()
+        warmup.fetch(application, sys.argv[1], warmup.warmup_host())
+        timings[name] = time.perf_counter() - start
+timings['lazy_loaded'] = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(stderr):
+    # [(module, self_us, cumulative_us)] from `python -X importtime` output
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Report what a server process imports at boot and how long it takes, per top-level "
+        "package, measured in a fresh interpreter with `python -X importtime`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help="Packages and modules to list.")
+        parser.add_argument('--request', default='',
+                            help="Also time the first and second GET of this path (e.g. /api/bootstrap/).")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'myproject.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, options['request'], *LAZY_MODULES],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Boot failed:\n{result.stderr[-2000:]}")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        report = {
+            'modules': len(modules),
+            'import_ms': round(sum(self_us for _, self_us, _ in modules) / 1000, 1),
+            'timings_ms': {
+                name: round(seconds * 1000, 1) for name, seconds in timings.items() if name != 'lazy_loaded'
+            },
+            'lazy_loaded_at_boot': timings['lazy_loaded'],
+            'packages_ms': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]
+            },
+            'slowest_modules_ms': {
+                name: round(cumulative_us / 1000, 1)
+                for name, _, cumulative_us in sorted(modules, key=lambda item: -item[2])[:options['top']]
+            },
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{report['modules']} modules imported in {report['import_ms']} ms")
+        for name, ms in report['timings_ms'].items():
+            self.stdout.write(f"{name}: {ms} ms")
+        if report['lazy_loaded_at_boot']:
+            self.stdout.write(f"WARNING: imported at boot: {', '.join(report['lazy_loaded_at_boot'])}")
+        self.stdout.write("\nBy package (self time):")
+        for name, ms in report['packages_ms'].items():
+            self.stdout.write(f"  {ms:>8} ms  {name}")
+        self.stdout.write("\nSlowest modules (cumulative):")
+        for name, ms in report['slowest_modules_ms'].items():
+            self.stdout.write(f"  {ms:>8} ms  {name}")
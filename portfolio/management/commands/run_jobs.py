@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio import history, jobs, webhooks
+
+# Seconds between sweeps of expired webhook delivery ids and history rows
+EVICT_INTERVAL = 600
+
+
+class Command(BaseCommand):
+    help = "Drain the background job queue (GitHub webhook syncs and friends)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument('--sleep', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help="Seconds to wait between polls when the queue is empty.")
+
+    def handle(self, *args, **options):
+        last_evict = None
+        while True:
+            if last_evict is None or time.monotonic() - last_evict > EVICT_INTERVAL:
+                webhooks.evict_expired_deliveries()
+                history.prune()
+                last_evict = time.monotonic()
+
+            ran, coalesced = jobs.run_pending()
+            if ran:
+                self.stdout.write(f"Ran {ran} job(s), coalesced {coalesced} duplicate(s).")
+            if options['once']:
+                break
+            if not ran:
+                time.sleep(options['sleep'])
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# --- IN-PROCESS METRICS ---
+# Plain counters and fixed-bucket histograms kept in this process and
+# rendered in the Prometheus text format by /metrics. Recording is a dict
+# lookup and an addition under a lock, cheap enough to leave on.
+#
+# Each worker process keeps its own numbers, from zero when it starts, and a
+# scrape is answered by whichever worker gunicorn hands it to. Every sample
+# carries a `pid` label so each worker is its own series: sum the per-series
+# rate(), e.g. sum without (pid) (rate(portfolio_requests_total[5m])). A
+# worker that is rarely scraped, or recycled (max_requests), shows up late
+# or not at all, so totals are approximate with several workers; run one
+# worker per scrape target (WEB_CONCURRENCY=1) where they must be exact.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                yield self.name, dict(zip(self.labels, label_values)), value
+
+    def type_name(self):
+        return 'counter'
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        # label values -> [per-bucket counts (+inf last), sum]
+        self.values = {}
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self.lock:
+            snapshot = sorted((label_values, list(counts), total) for label_values, (counts, total) in self.values.items())
+        for label_values, counts, total in snapshot:
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", dict(labels, le=str(bound)), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+    def type_name(self):
+        return 'histogram'
+
+
+REQUEST_DURATION = Histogram(
+    'portfolio_request_duration_seconds', 'Time spent handling a request, by view.', ('view', 'method'))
+REQUESTS = Counter(
+    'portfolio_requests_total', 'Requests handled, by view and status code.', ('view', 'method', 'status'))
+DB_QUERIES = Counter(
+    'portfolio_db_queries_total', 'Database queries run while handling requests, by view.', ('view',))
+DB_DURATION = Counter(
+    'portfolio_db_query_seconds_total', 'Time spent in database queries, by view.', ('view',))
+OUTBOUND_DURATION = Histogram(
+    'portfolio_outbound_request_duration_seconds', 'Calls to external services (GitHub, Cloudinary).', ('service',))
+OUTBOUND_ERRORS = Counter(
+    'portfolio_outbound_errors_total', 'Calls to external services that raised.', ('service',))
+QUERY_BUDGET_EXCEEDED = Counter(
+    'portfolio_query_budget_exceeded_total', 'Requests that ran more queries than their view allows.', ('view',))
+CACHE_LOOKUPS = Counter(
+    'portfolio_cache_lookups_total', 'Cached API reads by result (hit, miss, not_modified).', ('result',))
+COMPRESSION_BYTES = Counter(
+    'portfolio_compression_bytes_total', 'Response bytes before (in) and after (out) compression.',
+    ('encoding', 'direction'))
+COMPRESSION_DURATION = Histogram(
+    'portfolio_compression_duration_seconds', 'Time spent compressing response bodies (cache misses only).',
+    ('encoding',))
+COMPRESSION_CACHE = Counter(
+    'portfolio_compression_cache_total', 'Compressed bodies served from the cache (hit) or compressed now (miss).',
+    ('encoding', 'result'))
+
+REGISTRY = (
+    REQUEST_DURATION, REQUESTS, DB_QUERIES, DB_DURATION, QUERY_BUDGET_EXCEEDED,
+    OUTBOUND_DURATION, OUTBOUND_ERRORS, CACHE_LOOKUPS,
+    COMPRESSION_BYTES, COMPRESSION_DURATION, COMPRESSION_CACHE,
+)
+
+
+# --- PER-REQUEST TIMINGS (Server-Timing) ---
+class RequestStats:
+    # Filled in while one request runs. Shared with worker threads that copy
+    # the request's context (e.g. the concurrent GitHub fetches), hence the lock.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.outbound = {}
+        self.cache = None
+        self.compression = None
+
+    def add_query(self, duration):
+        with self.lock:
+            self.db_count += 1
+            self.db_time += duration
+
+    def add_outbound(self, service, duration):
+        with self.lock:
+            count, total = self.outbound.get(service, (0, 0.0))
+            self.outbound[service] = (count + 1, total + duration)
+
+    def server_timing(self, total):
+        parts = [f'app;dur={total * 1000:.1f}', f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"']
+        for service, (count, duration) in sorted(self.outbound.items()):
+            parts.append(f'{service};dur={duration * 1000:.1f};desc="{count} calls"')
+        if self.cache:
+            parts.append(f'cache;desc="{self.cache}"')
+        if self.compression:
+            encoding, ratio, duration, result = self.compression
+            parts.append(f'compress;dur={duration * 1000:.1f};desc="{encoding} {ratio:.1f}x {result}"')
+        return ', '.join(parts)
+
+
+current_stats = ContextVar('portfolio_request_stats', default=None)
+
+
+# Statements SQLite runs as SQL but Postgres does not (psycopg opens and
+# closes transactions itself); never counted, so budgets match on both.
+# Everything else is, DatabaseCache statements included: they are round
+# trips to the database like any other.
+TRANSACTION_SQL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def is_view_query(sql):
+    return not sql.startswith(TRANSACTION_SQL)
+
+
+def timed_query(execute, sql, params, many, context):
+    # Installed on every database connection (see apps.py)
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if is_view_query(sql):
+            stats.add_query(time.perf_counter() - start)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if timed_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_query)
+
+
+@contextmanager
+def track_outbound(service):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        OUTBOUND_ERRORS.inc((service,))
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        OUTBOUND_DURATION.observe((service,), duration)
+        stats = current_stats.get()
+        if stats is not None:
+            stats.add_outbound(service, duration)
+
+
+def record_cache(result):
+    CACHE_LOOKUPS.inc((result,))
+    stats = current_stats.get()
+    if stats is not None:
+        stats.cache = result
+
+
+def record_compression(encoding, size_in, size_out, duration, result):
+    # result is 'hit' (served from the cache, duration 0), 'miss' or
+    # 'uncached' (compressed for this response only)
+    COMPRESSION_BYTES.inc((encoding, 'in'), size_in)
+    COMPRESSION_BYTES.inc((encoding, 'out'), size_out)
+    if result != 'hit':
+        COMPRESSION_DURATION.observe((encoding,), duration)
+    if result != 'uncached':
+        COMPRESSION_CACHE.inc((encoding, result))
+    stats = current_stats.get()
+    if stats is not None:
+        stats.compression = (encoding, size_in / size_out if size_out else 0.0, duration, result)
+
+
+# --- PROMETHEUS TEXT FORMAT ---
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render():
+    pid = os.getpid()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name()}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{format_labels({**labels, 'pid': pid})} {value}")
+    return '\n'.join(lines) + '\n'
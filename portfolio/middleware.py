@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+from .budgets import check_budget
+from .cache import get_cache
+from .compression import CODECS, negotiate
+from .snapshot import HASH_LENGTH, SNAPSHOT_URL
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    # Records latency, status and DB time per view into portfolio.metrics,
+    # warns about requests over their query budget (budgets.py) and adds a
+    # Server-Timing header. Works under both WSGI and ASGI, so the
+    # async views are measured without an extra thread hop.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS_ENABLED
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def start(self):
+        stats = metrics.RequestStats()
+        return stats, metrics.current_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+        view = self.view_name(request)
+        metrics.REQUEST_DURATION.observe((view, request.method), duration)
+        metrics.REQUESTS.inc((view, request.method, str(response.status_code)))
+        if stats.db_count:
+            metrics.DB_QUERIES.inc((view,), stats.db_count)
+            metrics.DB_DURATION.inc((view,), stats.db_time)
+            budget = check_budget(request, stats.db_count)
+            if budget is not None:
+                metrics.QUERY_BUDGET_EXCEEDED.inc((view,))
+                logger.warning(
+                    "%s %s (%s) ran %d queries, over its budget of %d.",
+                    request.method, request.path, view, stats.db_count, budget,
+                )
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = stats.server_timing(duration)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        # URL names keep the label set small; unmatched paths (404s, static
+        # files) share one label instead of one series per URL
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        return match.view_name or match.route or 'unnamed'
+
+
+class SnapshotMiddleware:
+    # Serves the exported static snapshot (snapshot.py) through WhiteNoise,
+    # with its precompressed .br/.gz files: /snapshot/* to everyone and the
+    # home page to visitors without a session cookie, before sessions, auth
+    # or any query run. Logged-in admins still get the live page. Files are
+    # looked up per request (autorefresh) since exports replace them while
+    # the process runs.
+    def __init__(self, get_response):
+        if not settings.SNAPSHOT_SERVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.files = WhiteNoise(
+            None,
+            root=os.path.join(settings.SNAPSHOT_ROOT, 'current'),
+            autorefresh=True,
+            index_file=True,
+            # index.html and manifest.json revalidate; hashed JSON is immutable
+            max_age=0,
+            immutable_file_test=rf'\.[0-9a-f]{{{HASH_LENGTH}}}\.json$',
+        )
+
+    def __call__(self, request):
+        path = request.path_info
+        if request.method in ('GET', 'HEAD') and (path.startswith(SNAPSHOT_URL) or self.is_anonymous_home(request)):
+            static_file = self.files.find_file(path)
+            if static_file is not None:
+                response = WhiteNoiseMiddleware.serve(static_file, request)
+                if path == '/':
+                    patch_vary_headers(response, ('Cookie',))
+                return response
+        return self.get_response(request)
+
+    @staticmethod
+    def is_anonymous_home(request):
+        return request.path_info == '/' and settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+class CompressionMiddleware(GZipMiddleware):
+    # Responses with a strong ETag (the cached API payloads: the ETag covers
+    # the content version and the URL) are compressed with the best of
+    # COMPRESSION_ENCODINGS the client accepts, once per ETag and encoding;
+    # the compressed bytes are kept in the API cache, so repeated reads cost
+    # one cache lookup instead of a compression. Everything else (HTML,
+    # admin pages, streaming files) is gzipped per request exactly like
+    # GZipMiddleware, including its BREACH padding.
+    def process_response(self, request, response):
+        etag = response.get('ETag', '')
+        if (
+            response.streaming or response.status_code != 200 or not etag.startswith('"')
+            or response.has_header('Content-Encoding') or len(response.content) < 200
+        ):
+            return self.compress_uncached(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING'), settings.COMPRESSION_ENCODINGS)
+        if encoding is None:
+            return response
+
+        cache = get_cache()
+        key = f"portfolio:compressed:{encoding}:{hashlib.md5(etag.encode()).hexdigest()}"
+        content = response.content
+        compressed = cache.get(key)
+        if compressed is not None:
+            metrics.record_compression(encoding, len(content), len(compressed), 0.0, 'hit')
+        else:
+            start = time.perf_counter()
+            compressed = CODECS[encoding](content)
+            metrics.record_compression(encoding, len(content), len(compressed), time.perf_counter() - start, 'miss')
+            cache.set(key, compressed, timeout=settings.API_CACHE_TIMEOUT)
+        if len(compressed) >= len(content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = 'W/' + etag
+        return response
+
+    def compress_uncached(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        size = len(response.content)
+        start = time.perf_counter()
+        response = super().process_response(request, response)
+        if response.get('Content-Encoding') == 'gzip':
+            metrics.record_compression('gzip', size, len(response.content), time.perf_counter() - start, 'uncached')
+        return response
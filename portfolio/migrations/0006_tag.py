@@ -0,0 +1,71 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+def split_tags(apps, schema_editor):
+    # Turns the old comma-separated Project.tags strings into Tag rows
+    Project = apps.get_model('portfolio', 'Project')
+    Tag = apps.get_model('portfolio', 'Tag')
+    ProjectTag = Project.tags.through
+
+    project_tags = {}
+    for project_id, tags_text in Project.objects.exclude(tags_text='').values_list('id', 'tags_text'):
+        names = [name.strip() for name in tags_text.split(',') if name.strip()]
+        if names:
+            project_tags[project_id] = names
+
+    all_names = {name for names in project_tags.values() for name in names}
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+    ProjectTag.objects.bulk_create(
+        [
+            ProjectTag(project_id=project_id, tag_id=tag_ids[name])
+            for project_id, names in project_tags.items()
+            for name in dict.fromkeys(names)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def join_tags(apps, schema_editor):
+    Project = apps.get_model('portfolio', 'Project')
+    for project in Project.objects.prefetch_related('tags'):
+        project.tags_text = ', '.join(tag.name for tag in project.tags.all())
+        project.save(update_fields=['tags_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_list_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RenameField(
+            model_name='project',
+            old_name='tags',
+            new_name='tags_text',
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', to='portfolio.tag'),
+        ),
+        migrations.RunPython(split_tags, join_tags),
+        migrations.RemoveField(
+            model_name='project',
+            name='tags_text',
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:47
+
+from django.db import migrations
+
+# GIN indexes over the full-text vectors used by portfolio.search. They are
+# Postgres-only, so they are created here instead of in Model.Meta; on other
+# databases search falls back to the in-process inverted index. The
+# expressions must match portfolio.search exactly for Postgres to use them.
+INDEX_NAMES = {
+    'project': 'project_search_gin',
+    'skill': 'skill_search_gin',
+    'certificate': 'certificate_search_gin',
+}
+
+
+def search_indexes(apps):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return [
+        (apps.get_model('portfolio', 'Project'), GinIndex(
+            SearchVector('title', weight='A', config='english') + SearchVector('description', weight='B', config='english'),
+            name=INDEX_NAMES['project'],
+        )),
+        (apps.get_model('portfolio', 'Skill'), GinIndex(
+            SearchVector('name', weight='A', config='simple'),
+            name=INDEX_NAMES['skill'],
+        )),
+        (apps.get_model('portfolio', 'Certificate'), GinIndex(
+            SearchVector('name', weight='A', config='english') + SearchVector('issuer', weight='B', config='english'),
+            name=INDEX_NAMES['certificate'],
+        )),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model, index in search_indexes(apps):
+        schema_editor.add_index(model, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model, index in search_indexes(apps):
+        schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_sync_state(apps, schema_editor):
+    # Byte counts are only stored when languages are actually downloaded, so
+    # forget the old validators once to make the next sync fetch them all
+    apps.get_model('portfolio', 'GitHubSyncState').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectLanguage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='languages', to='portfolio.project')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usages', to='portfolio.skill')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'skill'), name='unique_project_language')],
+            },
+        ),
+        migrations.RunPython(reset_sync_state, migrations.RunPython.noop),
+    ]
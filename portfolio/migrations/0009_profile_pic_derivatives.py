@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_project_language'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_medium',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_thumb',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_webp',
+            field=models.URLField(blank=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:09
+
+import time
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_profile_pic_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='sync_generation',
+            field=models.BigIntegerField(db_index=True, default=time.time_ns),
+        ),
+    ]
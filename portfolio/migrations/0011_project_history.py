@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_project_sync_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(db_index=True)),
+                ('stars', models.IntegerField()),
+                ('languages', models.JSONField(default=dict)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='portfolio.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProjectHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily'), ('week', 'Weekly')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('stars', models.IntegerField()),
+                ('languages', models.JSONField(default=dict)),
+                ('recorded_at', models.DateTimeField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='portfolio.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='project_history_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'resolution', 'bucket'), name='unique_project_history_bucket')],
+            },
+        ),
+    ]
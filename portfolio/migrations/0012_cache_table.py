@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:02
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # The DatabaseCache table (settings.CACHE_TABLE) is not a model, so
+    # `migrate` alone would not create it; a no-op with Redis configured
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_project_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,9 @@
+import time
+
 from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class Profile(models.Model):
@@ -7,22 +12,67 @@ class Profile(models.Model):
     role = models.CharField(max_length=150, default="Developer")
     bio = models.TextField()
     profile_pic = models.URLField(default='https://via.placeholder.com/300', blank=True)
+    # Resized copies generated by Cloudinary on upload (see uploads.py)
+    profile_pic_thumb = models.URLField(blank=True)
+    profile_pic_medium = models.URLField(blank=True)
+    profile_pic_webp = models.URLField(blank=True)
     email = models.EmailField()
     linkedin_url = models.URLField(blank=True)
     discord_url = models.URLField(blank=True, verbose_name="Discord Link")
     instagram_url = models.URLField(blank=True)
     whatsapp_number = models.CharField(max_length=30, blank=True, verbose_name="WhatsApp Number")
 
+    DERIVATIVE_FIELDS = ('profile_pic_thumb', 'profile_pic_medium', 'profile_pic_webp')
+
     def __str__(self): return self.full_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'profile_pic' in instance.__dict__:
+            instance._stored_profile_pic = instance.profile_pic
+        return instance
+
+    def save(self, *args, **kwargs):
+        # A picture set any other way than uploads.upload_profile_pic (which
+        # writes all four fields with update()), e.g. a URL typed into the
+        # admin or PATCHed through the API, has no resized copies: clear them
+        # so the home page does not keep showing the old image.
+        if self.profile_pic != getattr(self, '_stored_profile_pic', self.profile_pic):
+            for field in self.DERIVATIVE_FIELDS:
+                setattr(self, field, '')
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *self.DERIVATIVE_FIELDS}
+        super().save(*args, **kwargs)
+        self._stored_profile_pic = self.profile_pic
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self): return self.name
+
 class Project(models.Model):
     github_url = models.URLField(unique=True)
     title = models.CharField(max_length=200)
     description = models.TextField()
-    tags = models.CharField(max_length=500, blank=True)
+    tags = models.ManyToManyField(Tag, related_name='projects', blank=True)
     stars = models.IntegerField(default=0)
     is_synced = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stamped with the start time (ns) of the last full sync that saw this
+    # repository; rows created in between get their creation time. A
+    # complete sync deletes every row older than its own start.
+    sync_generation = models.BigIntegerField(default=time.time_ns, db_index=True)
+
+    class Meta:
+        # Back the cursor-paginated orderings exposed by ProjectViewSet
+        indexes = [
+            models.Index(fields=['stars', 'id'], name='project_stars_idx'),
+            models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+        ]
 
     def __str__(self): return self.title
 
@@ -34,10 +84,124 @@ class Certificate(models.Model):
     issue_date = models.DateField()
     source = models.CharField(max_length=50, default="Manual")
 
+    class Meta:
+        indexes = [models.Index(fields=['issue_date', 'id'], name='certificate_issue_date_idx')]
+
     def __str__(self): return f"{self.name} - {self.issuer}"
 
+class SkillQuerySet(models.QuerySet):
+    def with_usage(self):
+        # Annotates `bytes`: total bytes of this language across all projects
+        return self.annotate(bytes=Coalesce(Sum('usages__bytes'), 0))
+
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
     category = models.CharField(max_length=50, default='Soft')
 
-    def __str__(self): return f"{self.name} ({self.category})"
\ No newline at end of file
+    objects = SkillQuerySet.as_manager()
+
+    def __str__(self): return f"{self.name} ({self.category})"
+
+class ProjectLanguage(models.Model):
+    # Bytes of code per language per project, as reported by languages_url
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='languages')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='usages')
+    bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['project', 'skill'], name='unique_project_language')]
+
+    def __str__(self): return f"{self.project} - {self.skill.name}: {self.bytes}"
+
+
+class GitHubSyncState(models.Model):
+    # Conditional-request validators for a GitHub API URL (the repo list or a
+    # repo's languages_url), plus the pushed_at watermark seen at last fetch.
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self): return self.url
+
+
+class Job(models.Model):
+    # A unit of background work drained by `manage.py run_jobs`. Jobs that
+    # share a key (e.g. the same repository) are coalesced into one run.
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=500, db_index=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self): return f"{self.kind} {self.key} ({self.status})"
+
+
+class WebhookDelivery(models.Model):
+    # X-GitHub-Delivery ids already accepted, so redeliveries are dropped.
+    # Rows older than GITHUB_WEBHOOK_DELIVERY_TTL are evicted by run_jobs.
+    delivery_id = models.CharField(max_length=100, unique=True)
+    received_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self): return self.delivery_id
+
+
+class ProjectSample(models.Model):
+    # Append-only record of a project's stars and {language: bytes} as seen
+    # by one sync. Kept for HISTORY_SAMPLE_RETENTION_DAYS; reads go to the
+    # ProjectHistory rollups (see history.py).
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='samples')
+    recorded_at = models.DateTimeField(db_index=True)
+    stars = models.IntegerField()
+    languages = models.JSONField(default=dict)
+
+    def __str__(self): return f"{self.project} @ {self.recorded_at}: {self.stars}"
+
+
+class ProjectHistory(models.Model):
+    # One row per project, resolution and bucket holding the last sample
+    # recorded in that hour, day or week (UTC, weeks start on Monday)
+    HOUR = 'hour'
+    DAY = 'day'
+    WEEK = 'week'
+    RESOLUTION_CHOICES = [
+        (HOUR, 'Hourly'),
+        (DAY, 'Daily'),
+        (WEEK, 'Weekly'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='history')
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField()
+    stars = models.IntegerField()
+    languages = models.JSONField(default=dict)
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Also serves the history reads: project + resolution + bucket range
+            models.UniqueConstraint(fields=['project', 'resolution', 'bucket'], name='unique_project_history_bucket'),
+        ]
+        # Retention deletes per resolution
+        indexes = [models.Index(fields=['resolution', 'bucket'], name='project_history_bucket_idx')]
+
+    def __str__(self): return f"{self.project} {self.resolution} {self.bucket}: {self.stars}"
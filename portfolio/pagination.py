@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PortfolioCursorPagination(CursorPagination):
+    # Keyset pagination: every page is an indexed range scan, however deep
+    # the client scrolls. ?page_size= lets the front end size the first screen.
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        # Rows that tie on a client-supplied ordering (?ordering=-stars) would
+        # come back in whatever order the database likes, so a page could
+        # repeat or skip them. id breaks the tie, in the same direction so
+        # the (field, id) indexes still serve the scan.
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
@@ -0,0 +1,232 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .cache import get_content_version
+from .models import Project, Skill, Certificate
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_RESULTS = 20
+
+# Field weights, mirrored by the A/B weights of the Postgres vectors
+TITLE_WEIGHT = 1.0
+TAG_WEIGHT = 0.6
+BODY_WEIGHT = 0.4
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def project_result(project):
+    return {'type': 'project', 'id': project.id, 'title': project.title, 'url': project.github_url}
+
+
+def skill_result(skill):
+    return {'type': 'skill', 'id': skill.id, 'title': skill.name, 'category': skill.category}
+
+
+def certificate_result(certificate):
+    return {'type': 'certificate', 'id': certificate.id, 'title': certificate.name, 'issuer': certificate.issuer}
+
+
+# --- POSTGRES: SearchVector + GIN ---
+# These expressions must stay identical to the GIN indexes created in
+# migration 0007, otherwise Postgres will not use them.
+def project_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('title', weight='A', config='english') + SearchVector('description', weight='B', config='english')
+
+
+def skill_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('name', weight='A', config='simple')
+
+
+def certificate_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('name', weight='A', config='english') + SearchVector('issuer', weight='B', config='english')
+
+
+def search_postgres(q):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    scored = {}
+
+    def collect(queryset, vector, config, to_result):
+        query = SearchQuery(q, config=config, search_type='websearch')
+        matches = (
+            queryset.annotate(search=vector, rank=SearchRank(vector, query))
+            .filter(search=query)
+            .order_by('-rank')[:MAX_RESULTS]
+        )
+        for obj in matches:
+            result = to_result(obj)
+            scored[(result['type'], obj.id)] = (obj.rank, result)
+
+    collect(Project.objects.all(), project_vector(), 'english', project_result)
+    collect(Skill.objects.all(), skill_vector(), 'simple', skill_result)
+    collect(Certificate.objects.all(), certificate_vector(), 'english', certificate_result)
+
+    # Tags live in their own table; an exact tag name match boosts the project
+    terms = tokenize(q)
+    if terms:
+        tag_filter = Q()
+        for term in terms:
+            tag_filter |= Q(tags__name__iexact=term)
+        for project in Project.objects.filter(tag_filter).distinct()[:MAX_RESULTS]:
+            rank, result = scored.get(('project', project.id), (0.0, project_result(project)))
+            scored[('project', project.id)] = (rank + TAG_WEIGHT, result)
+
+    return rank_results(scored.values())
+
+
+# --- FALLBACK: in-process inverted index ---
+class InvertedIndex:
+    # token -> {doc_key: weight}. Kept up to date incrementally from model
+    # signals in this process, and rebuilt whenever the content version moves
+    # for any other reason (bulk writes, other worker processes).
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = defaultdict(dict)
+        self.vocabulary = []
+        self.documents = {}
+        self.version = None
+
+    def add(self, key, result, fields):
+        # fields is a list of (text, weight)
+        with self.lock:
+            self.remove(key)
+            weights = defaultdict(float)
+            for text, weight in fields:
+                for token in tokenize(text):
+                    weights[token] += weight
+            for token, weight in weights.items():
+                if token not in self.postings:
+                    insort(self.vocabulary, token)
+                self.postings[token][key] = weight
+            self.documents[key] = (result, list(weights))
+
+    def remove(self, key):
+        with self.lock:
+            document = self.documents.pop(key, None)
+            if document is None:
+                return
+            for token in document[1]:
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self.postings[token]
+                        self.vocabulary.pop(bisect_left(self.vocabulary, token))
+
+    def rebuild(self, version):
+        with self.lock:
+            self.postings = defaultdict(dict)
+            self.vocabulary = []
+            self.documents = {}
+            for project in Project.objects.prefetch_related('tags'):
+                self.add_project(project)
+            for skill in Skill.objects.all():
+                self.add_skill(skill)
+            for certificate in Certificate.objects.all():
+                self.add_certificate(certificate)
+            self.version = version
+
+    def add_project(self, project):
+        tags = ' '.join(tag.name for tag in project.tags.all())
+        self.add(('project', project.id), project_result(project),
+                 [(project.title, TITLE_WEIGHT), (tags, TAG_WEIGHT), (project.description, BODY_WEIGHT)])
+
+    def add_skill(self, skill):
+        self.add(('skill', skill.id), skill_result(skill), [(skill.name, TITLE_WEIGHT)])
+
+    def add_certificate(self, certificate):
+        self.add(('certificate', certificate.id), certificate_result(certificate),
+                 [(certificate.name, TITLE_WEIGHT), (certificate.issuer, BODY_WEIGHT)])
+
+    def matches(self, term):
+        # Prefix match over the sorted vocabulary: a bisect plus a short scan
+        position = bisect_left(self.vocabulary, term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+            token = self.vocabulary[position]
+            yield token, (1.0 if token == term else 0.5)
+            position += 1
+
+    def search(self, q):
+        terms = tokenize(q)
+        if not terms:
+            return []
+        version = get_content_version()
+        with self.lock:
+            if self.version != version:
+                self.rebuild(version)
+
+            # Every term has to match (AND), scores add up across terms
+            scores = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                for token, closeness in self.matches(term):
+                    for key, weight in self.postings[token].items():
+                        term_scores[key] += weight * closeness
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: scores[key] + score for key, score in term_scores.items() if key in scores}
+                if not scores:
+                    return []
+            return rank_results((score, self.documents[key][0]) for key, score in scores.items())
+
+
+index = InvertedIndex()
+
+
+def mark_stale():
+    # Forces a rebuild on the next search. Used after bulk writes, which
+    # bypass the model signals the index listens to; runs on commit after any
+    # incremental updates queued by the same transaction.
+    def clear_version():
+        index.version = None
+    transaction.on_commit(clear_version)
+
+
+def sync_instance(key, instance=None):
+    # Applies one signal-driven change (instance=None means deleted). Runs on
+    # commit, after the content version bump it corresponds to. Any other
+    # bump in between (another process's write) means changes this index
+    # never saw, so it is dropped and the next search rebuilds it.
+    with index.lock:
+        if index.version is None:
+            return
+        version = get_content_version()
+        if version != index.version + 1:
+            index.version = None
+            return
+        if instance is None:
+            index.remove(key)
+        elif isinstance(instance, Project):
+            index.add_project(instance)
+        elif isinstance(instance, Skill):
+            index.add_skill(instance)
+        elif isinstance(instance, Certificate):
+            index.add_certificate(instance)
+        index.version = version
+
+
+def index_key(instance):
+    return (type(instance).__name__.lower(), instance.pk)
+
+
+def rank_results(scored):
+    ranked = sorted(scored, key=lambda item: item[0], reverse=True)[:MAX_RESULTS]
+    return [dict(result, score=round(float(score), 4)) for score, result in ranked]
+
+
+def search(q):
+    if connection.vendor == 'postgresql':
+        return search_postgres(q)
+    return index.search(q)
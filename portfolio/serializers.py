@@ -1,25 +1,119 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Profile, Project, Certificate, Skill
+from .models import Profile, Project, Certificate, Skill, Tag
+
+
+class SparseFieldsMixin:
+    # Lets clients ask for a subset of fields with ?fields=id,title
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        allowed = {name.strip() for name in requested.split(',')}
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
 
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
-        fields = '__all__'
+        fields = [
+            'id', 'full_name', 'role', 'bio', 'profile_pic', 'profile_pic_thumb', 'profile_pic_medium',
+            'profile_pic_webp', 'email', 'linkedin_url', 'discord_url', 'instagram_url', 'whatsapp_number', 'user',
+        ]
+        # Filled in by the background upload
+        read_only_fields = ['profile_pic_thumb', 'profile_pic_medium', 'profile_pic_webp']
 
-class ProjectSerializer(serializers.ModelSerializer):
-    tags_list = serializers.SerializerMethodField()
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Reads the prefetched Tag rows; no per-row string work
+    tags_list = serializers.SlugRelatedField(source='tags', slug_field='name', many=True, read_only=True)
     class Meta:
         model = Project
         fields = ['id', 'title', 'description', 'tags_list', 'github_url', 'stars', 'created_at']
-    def get_tags_list(self, obj):
-        return [tag.strip() for tag in obj.tags.split(',') if tag]
 
-class CertificateSerializer(serializers.ModelSerializer):
+class CertificateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Certificate
         fields = ['id', 'name', 'issuer', 'issue_date', 'credential_url', 'credential_file']
 
 class SkillSerializer(serializers.ModelSerializer):
+    # Total bytes across projects, annotated by Skill.objects.with_usage()
+    bytes = serializers.IntegerField(read_only=True)
     class Meta:
         model = Skill
-        fields = ['id', 'name', 'category']
\ No newline at end of file
+        fields = ['id', 'name', 'category', 'bytes']
+
+# --- VALUES() FAST PATH ---
+# Read-only lists skip ModelSerializer: rows come from .values() and are
+# turned into the same dicts the serializers above produce (same keys, same
+# order, same string formats), wrapped in fastjson.PlainJSON. Any field
+# added above must be added here too; the tests compare both byte for byte.
+
+def format_datetime(value):
+    # DRF DateTimeField: ISO 8601 in the current time zone, UTC written as Z
+    if not value:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def format_date(value):
+    return value.isoformat() if value else None
+
+
+def row_builder(fields, converters):
+    # Returns a function turning one values() dict into an output row with
+    # `fields` (the serializer's, after ?fields=) in order
+    getters = [(name, converters.get(name)) for name in fields]
+
+    def build(values):
+        return {
+            name: values[name] if convert is None else convert(values)
+            for name, convert in getters
+        }
+    return build
+
+
+def project_values(queryset):
+    return queryset.prefetch_related(None).values('id', 'title', 'description', 'github_url', 'stars', 'created_at')
+
+
+def project_tags(project_ids):
+    # project id -> tag names, in the order the tags prefetch returns them
+    tags = {}
+    rows = Tag.objects.filter(projects__in=project_ids).values_list('projects__id', 'name')
+    for project_id, name in rows:
+        tags.setdefault(project_id, []).append(name)
+    return tags
+
+
+def project_rows(values, fields):
+    tags = project_tags([row['id'] for row in values]) if 'tags_list' in fields else {}
+    build = row_builder(fields, {
+        'tags_list': lambda row: tags.get(row['id'], []),
+        'created_at': lambda row: format_datetime(row['created_at']),
+    })
+    return [build(row) for row in values]
+
+
+def certificate_values(queryset):
+    return queryset.values('id', 'name', 'issuer', 'issue_date', 'credential_url', 'credential_file')
+
+
+def certificate_rows(values, fields):
+    build = row_builder(fields, {'issue_date': lambda row: format_date(row['issue_date'])})
+    return [build(row) for row in values]
+
+
+def skill_values(queryset):
+    return queryset.values('id', 'name', 'category', 'bytes')
+
+
+def skill_rows(values, fields=SkillSerializer.Meta.fields):
+    build = row_builder(fields, {})
+    return [build(row) for row in values]
@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import search
+from .cache import invalidate_content
+from .models import Profile, Project, Certificate, Skill, Tag
+
+# Any change to public content invalidates every cached API response.
+# QuerySet.delete() (e.g. the sync cleanup) sends post_delete per row too;
+# bulk_create() does not, so the sync calls invalidate_content() itself.
+CONTENT_MODELS = (Profile, Project, Certificate, Skill, Tag)
+
+
+def invalidate_on_change(sender, **kwargs):
+    invalidate_content()
+
+
+def invalidate_on_m2m_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_content()
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(invalidate_on_change, sender=model, dispatch_uid=f'invalidate_{model.__name__}_save')
+    post_delete.connect(invalidate_on_change, sender=model, dispatch_uid=f'invalidate_{model.__name__}_delete')
+
+m2m_changed.connect(invalidate_on_m2m_change, sender=Project.tags.through, dispatch_uid='invalidate_project_tags')
+
+
+# --- SEARCH INDEX (in-process fallback used when not on Postgres) ---
+SEARCH_MODELS = (Project, Skill, Certificate)
+
+
+def index_on_save(sender, instance, **kwargs):
+    key = search.index_key(instance)
+    transaction.on_commit(lambda: search.sync_instance(key, instance))
+
+
+def index_on_delete(sender, instance, **kwargs):
+    # The key is taken now; Django clears instance.pk once the delete is done
+    key = search.index_key(instance)
+    transaction.on_commit(lambda: search.sync_instance(key))
+
+
+def index_on_tag_change(sender, **kwargs):
+    # A renamed or deleted tag touches many projects at once
+    search.mark_stale()
+
+
+def index_on_tags_change(sender, instance, action, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Project):
+        index_on_save(sender, instance)
+    else:
+        search.mark_stale()
+
+
+for model in SEARCH_MODELS:
+    post_save.connect(index_on_save, sender=model, dispatch_uid=f'search_{model.__name__}_save')
+    post_delete.connect(index_on_delete, sender=model, dispatch_uid=f'search_{model.__name__}_delete')
+
+post_save.connect(index_on_tag_change, sender=Tag, dispatch_uid='search_tag_save')
+post_delete.connect(index_on_tag_change, sender=Tag, dispatch_uid='search_tag_delete')
+m2m_changed.connect(index_on_tags_change, sender=Project.tags.through, dispatch_uid='search_project_tags')
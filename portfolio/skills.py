@@ -0,0 +1,93 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_CATEGORY = 'Soft'
+
+# Exact (lowercased) GitHub language names per category
+SKILL_CATEGORIES = {
+    'Frontend': [
+        'javascript', 'typescript', 'html', 'css', 'vue', 'react', 'angular', 'svelte',
+        'jsx', 'tsx', 'scss', 'sass', 'less', 'stylus', 'coffeescript', 'elm', 'astro',
+    ],
+    'Backend': [
+        'python', 'django', 'java', 'c', 'c++', 'c#', 'ruby', 'php', 'go', 'rust', 'swift',
+        'sql', 'plpgsql', 'tsql', 'kotlin', 'scala', 'elixir', 'erlang', 'haskell', 'dart',
+        'perl', 'lua', 'r', 'julia', 'clojure', 'f#', 'objective-c', 'zig', 'nim',
+    ],
+    'Tools': [
+        'docker', 'dockerfile', 'git', 'linux', 'bash', 'shell', 'powershell', 'batchfile',
+        'makefile', 'cmake', 'jupyter notebook', 'vim script', 'vim snippet', 'cuda', 'nix',
+        'hcl', 'procfile', 'yaml', 'nginx',
+    ],
+}
+
+# Whole-word aliases for names that are not listed exactly, e.g. "Vue.js",
+# "Go Template" or "Python console". Word boundaries keep "go" out of "Mongo".
+SKILL_CATEGORY_ALIASES = {
+    'Frontend': ['javascript', 'typescript', 'html', 'css', 'vue', 'react', 'svelte', 'angular'],
+    'Backend': ['python', 'java', 'ruby', 'php', 'go', 'rust', 'sql', 'kotlin', 'scala', 'elixir'],
+    'Tools': ['docker', 'shell', 'bash', 'make', 'vim'],
+}
+
+
+class SkillCategorizer:
+    # Compiled once: an exact-match dict plus one alias regex whose named
+    # groups are the categories, so categorizing is a dict lookup and at most
+    # one regex search per distinct name.
+    def __init__(self, categories, aliases, default=DEFAULT_CATEGORY):
+        self.default = default
+        self.memo = {}
+        self.exact = {}
+        for category, names in categories.items():
+            for name in names:
+                self.exact.setdefault(name.lower(), category)
+
+        groups = [
+            f"(?P<{self.group_name(index)}>{'|'.join(re.escape(alias.lower()) for alias in category_aliases)})"
+            for index, category_aliases in enumerate(aliases.values()) if category_aliases
+        ]
+        self.group_categories = {self.group_name(index): category for index, category in enumerate(aliases)}
+        self.pattern = re.compile(r'(?<!\w)(?:' + '|'.join(groups) + r')(?!\w)') if groups else None
+
+    @staticmethod
+    def group_name(index):
+        return f"c{index}"
+
+    def match_alias(self, lang):
+        match = self.pattern.search(lang) if self.pattern else None
+        return self.group_categories[match.lastgroup] if match else self.default
+
+    def categorize(self, language_name):
+        if not language_name:
+            return self.default
+        lang = language_name.lower()
+        category = self.exact.get(lang)
+        if category is None:
+            category = self.memo.get(lang)
+            if category is None:
+                category = self.memo[lang] = self.match_alias(lang)
+        return category
+
+
+@lru_cache(maxsize=None)
+def get_categorizer():
+    # SKILL_CATEGORIES / SKILL_CATEGORY_ALIASES in settings replace the
+    # defaults above category by category
+    return SkillCategorizer(
+        {**SKILL_CATEGORIES, **getattr(settings, 'SKILL_CATEGORIES', {})},
+        {**SKILL_CATEGORY_ALIASES, **getattr(settings, 'SKILL_CATEGORY_ALIASES', {})},
+    )
+
+
+@receiver(setting_changed)
+def reset_categorizer(setting, **kwargs):
+    if setting in ('SKILL_CATEGORIES', 'SKILL_CATEGORY_ALIASES'):
+        get_categorizer.cache_clear()
+
+
+def get_skill_category(language_name):
+    return get_categorizer().categorize(language_name)
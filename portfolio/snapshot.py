@@ -0,0 +1,118 @@
+import hashlib
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.urls import resolve
+from whitenoise.compress import Compressor
+
+from .cache import get_content_version
+from .fastjson import dumps
+from .models import Profile, Project, Certificate, Skill
+from .serializers import (
+    ProfileSerializer, ProjectSerializer, CertificateSerializer,
+    project_values, project_rows, certificate_values, certificate_rows, skill_values, skill_rows,
+)
+
+# --- STATIC SNAPSHOT ---
+# The public site only changes on admin edits and syncs, so it can be
+# exported as plain files: the anonymous home page plus JSON for the four
+# API resources, precompressed (gzip, and brotli when installed) for
+# WhiteNoise or any static file server. Layout under SNAPSHOT_ROOT:
+#
+#   releases/<id>/index.html(.gz/.br)
+#   releases/<id>/snapshot/manifest.json(.gz/.br)        -> hashed names
+#   releases/<id>/snapshot/<resource>.<hash>.json(.gz/.br)
+#   current -> releases/<id>
+#
+# Every export is written to a new release and published by swapping the
+# `current` symlink, so readers never see a half-written snapshot.
+
+SNAPSHOT_URL = '/snapshot/'
+# Hex digits of the content hash in file names (like ManifestStaticFilesStorage)
+HASH_LENGTH = 12
+
+
+def resources():
+    # Unpaginated versions of the API lists, in the viewsets' default order
+    return {
+        'profile': ProfileSerializer(Profile.objects.first()).data,
+        'projects': project_rows(
+            project_values(Project.objects.order_by('-created_at', '-id')), ProjectSerializer.Meta.fields),
+        'certificates': certificate_rows(
+            certificate_values(Certificate.objects.order_by('-issue_date', '-id')), CertificateSerializer.Meta.fields),
+        'skills': skill_rows(skill_values(Skill.objects.with_usage().order_by('id'))),
+    }
+
+
+def render_home():
+    # The home page exactly as an anonymous visitor gets it from home_view
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = '/'
+    request.user = AnonymousUser()
+    match = resolve('/')
+    response = match.func(request, *match.args, **match.kwargs)
+    return response.content
+
+
+def hashed_name(name, content):
+    digest = hashlib.md5(content).hexdigest()[:HASH_LENGTH]
+    return f"{name}.{digest}.json"
+
+
+def write_file(path, content, compressor):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(content)
+    compressor.compress(path)
+
+
+def export_snapshot(root=None):
+    # Returns the manifest of the published release
+    root = root or settings.SNAPSHOT_ROOT
+    releases = os.path.join(root, 'releases')
+    release_id = str(time.time_ns())
+    release = os.path.join(releases, release_id)
+    compressor = Compressor(quiet=True)
+
+    version = get_content_version()
+    files = {}
+    for name, data in resources().items():
+        content = dumps(data)
+        filename = hashed_name(name, content)
+        write_file(os.path.join(release, 'snapshot', filename), content, compressor)
+        files[name] = SNAPSHOT_URL + filename
+    manifest = {'version': version, 'files': files}
+    write_file(os.path.join(release, 'snapshot', 'manifest.json'), dumps(manifest), compressor)
+    write_file(os.path.join(release, 'index.html'), render_home(), compressor)
+
+    publish(root, os.path.join('releases', release_id))
+    prune(releases, keep=settings.SNAPSHOT_KEEP)
+    print(f"Snapshot exported to {release} ({len(files)} resources, content version {version})")
+    return manifest
+
+
+def publish(root, target):
+    # os.replace() of a symlink is atomic: a request sees the old release or
+    # the new one, never a mix
+    link = os.path.join(root, 'current')
+    tmp_link = f"{link}.{os.getpid()}.tmp"
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, link)
+
+
+def prune(releases, keep):
+    # Older releases are kept briefly for requests that resolved the previous
+    # `current` but have not opened its files yet
+    names = sorted(os.listdir(releases), key=int)
+    for name in names[:-keep]:
+        shutil.rmtree(os.path.join(releases, name), ignore_errors=True)
+
+
+def export_job(payload):
+    # Job handler (kind 'export_snapshot'); see cache.schedule_snapshot
+    export_snapshot()
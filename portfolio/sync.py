@@ -0,0 +1,337 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import github, history, search
+from .cache import invalidate_content
+from .models import Project, ProjectLanguage, Skill, Tag, GitHubSyncState, Job
+from .skills import get_skill_category
+
+
+class SyncIncomplete(Exception):
+    # Raised when a sync saved what it could but should be retried
+    pass
+
+
+# --- SET-BASED WRITES ---
+def upsert_projects(rows, update_fields, tags=()):
+    # rows are Project field dicts keyed by github_url. New rows are inserted
+    # with every field and get `tags`; existing rows only get update_fields
+    # written, and only when one of them actually changed.
+    # Returns (created_urls, existing_count).
+    rows = list({row['github_url']: row for row in rows}.values())
+    urls = [row['github_url'] for row in rows]
+    existing = {
+        current['github_url']: current
+        for current in Project.objects.filter(github_url__in=urls).values('github_url', *update_fields)
+    }
+
+    to_write = []
+    for row in rows:
+        current = existing.get(row['github_url'])
+        if current is None or any(current[field] != row[field] for field in update_fields):
+            to_write.append(Project(**row))
+
+    if to_write:
+        Project.objects.bulk_create(
+            to_write,
+            update_conflicts=True,
+            unique_fields=['github_url'],
+            update_fields=update_fields,
+        )
+
+    created_urls = [url for url in urls if url not in existing]
+    if created_urls and tags:
+        add_tags(list(Project.objects.filter(github_url__in=created_urls).values_list('id', flat=True)), tags)
+    return created_urls, len(existing)
+
+
+def add_tags(project_ids, tag_names):
+    # Attaches tag_names to every project in three queries, however many
+    # projects there are
+    Tag.objects.bulk_create([Tag(name=name) for name in tag_names], ignore_conflicts=True)
+    tag_ids = list(Tag.objects.filter(name__in=tag_names).values_list('id', flat=True))
+    ProjectTag = Project.tags.through
+    ProjectTag.objects.bulk_create(
+        [ProjectTag(project_id=project_id, tag_id=tag_id) for project_id in project_ids for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+
+
+def create_skills(language_names):
+    # One INSERT for every language; existing skills are left untouched
+    names = list(dict.fromkeys(name for name in language_names if name))
+    if names:
+        Skill.objects.bulk_create(
+            [Skill(name=name, category=get_skill_category(name)) for name in names],
+            ignore_conflicts=True,
+        )
+    return names
+
+
+def save_languages(languages_by_url):
+    # languages_by_url maps a project's github_url to the {language: bytes}
+    # dict from its languages_url. Creates missing skills and replaces the
+    # byte counts of those projects, in a fixed number of queries.
+    if not languages_by_url:
+        return
+    names = create_skills(name for languages in languages_by_url.values() for name in languages)
+    skill_ids = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+    project_ids = dict(Project.objects.filter(github_url__in=list(languages_by_url)).values_list('github_url', 'id'))
+
+    ProjectLanguage.objects.filter(project_id__in=project_ids.values()).delete()
+    ProjectLanguage.objects.bulk_create([
+        ProjectLanguage(project_id=project_ids[url], skill_id=skill_ids[name], bytes=size)
+        for url, languages in languages_by_url.items() if url in project_ids
+        for name, size in languages.items() if name in skill_ids
+    ])
+
+
+# --- FULL ACCOUNT SYNC ---
+def sync_github_account(username):
+    # Every repository in the listing is stamped with this generation; the
+    # ones left older afterwards are gone from GitHub
+    generation = time.time_ns()
+    session = github.build_session()
+    try:
+        # 0. Conditional list request. A 304 means nothing changed on GitHub
+        # since the last complete sync, so there is nothing to do.
+        list_url = github.repos_url(username)
+        list_state = github.load_states([list_url]).get(list_url)
+        listing = github.get_user_repos(session, username, list_state)
+        if listing.status_code == 304:
+            return "Sync Complete. No changes on GitHub since the last sync."
+        repos = listing.repos
+
+        # 1. DEEP SYNC SKILLS (Get ALL languages for every repo concurrently)
+        # Only repos whose pushed_at moved since the last fetch are asked
+        # again, and those requests are conditional on the stored ETag.
+        language_repos = [repo for repo in repos if repo.get('languages_url')]
+        states = github.load_states([repo['languages_url'] for repo in language_repos])
+        changed_repos = []
+        for repo in language_repos:
+            state = states.get(repo['languages_url'])
+            pushed_at = github.parse_pushed_at(repo.get('pushed_at'))
+            if state is None or pushed_at is None or state.pushed_at != pushed_at:
+                changed_repos.append(repo)
+
+        # Fetch what fits in the rate limit now, most recently pushed first;
+        # the rest is queued to run once the window resets
+        budget = github.rate_limit.available()
+        deferred = []
+        if budget is not None and len(changed_repos) > budget:
+            changed_repos.sort(key=lambda repo: repo.get('pushed_at') or '', reverse=True)
+            changed_repos, deferred = changed_repos[:budget], changed_repos[budget:]
+
+        results = github.fetch_all_languages(
+            session, [(repo['languages_url'], states.get(repo['languages_url'])) for repo in changed_repos]
+        )
+    finally:
+        github.close_session(session)
+
+    languages_by_url = {}
+    new_states = []
+    complete = True
+    for repo, result in zip(changed_repos, results):
+        state = states.get(repo['languages_url'])
+        pushed_at = github.parse_pushed_at(repo.get('pushed_at'))
+        if isinstance(result.error, github.RateLimited):
+            # The budget ran out mid-batch (e.g. spent by another process)
+            deferred.append(repo)
+        elif result.error is not None:
+            complete = False
+            print(f"Error fetching detailed languages for {repo['name']}: {result.error}")
+        elif result.status_code == 200:
+            languages_by_url[repo['html_url']] = result.data
+            new_states.append(GitHubSyncState(
+                url=repo['languages_url'], etag=result.etag,
+                last_modified=result.last_modified, pushed_at=pushed_at,
+            ))
+        elif result.status_code == 304:
+            # Languages unchanged, only move the watermark forward
+            new_states.append(GitHubSyncState(
+                url=repo['languages_url'], etag=state.etag,
+                last_modified=state.last_modified, pushed_at=pushed_at,
+            ))
+        else:
+            complete = False
+            print(f"Unexpected status {result.status_code} fetching languages for {repo['name']}")
+
+    # Only remember the list ETag once every repo is synced or queued,
+    # otherwise the next sync would 304 and never retry the failures. A
+    # longer listing is always fetched in full: page 1 answering 304 says
+    # nothing about the pages after it.
+    if complete:
+        single_page = listing.pages == 1
+        new_states.append(GitHubSyncState(
+            url=list_url,
+            etag=listing.etag if single_page else '',
+            last_modified=listing.last_modified if single_page else '',
+        ))
+
+    # 2. Write everything in one transaction with a fixed number of queries
+    rows = [{
+        'github_url': repo['html_url'],
+        'title': repo['name'],
+        'description': repo['description'] or "No description provided.",
+        'stars': repo['stargazers_count'],
+        'is_synced': True,
+        'sync_generation': generation,
+    } for repo in repos]
+
+    with transaction.atomic():
+        # sync_generation differs on every listed row, so the upsert writes
+        # them all: that is the stamp the sweep below relies on
+        created_urls, count_updated = upsert_projects(
+            rows, update_fields=['stars', 'sync_generation'], tags=['GitHub', 'Project'],
+        )
+        save_languages(languages_by_url)
+        history.record_samples(Project.objects.filter(sync_generation=generation))
+        github.save_states(new_states)
+        defer_language_fetches(deferred)
+        invalidate_content()
+        search.mark_stale()
+
+        # 3. Delete projects that are no longer on GitHub. Skipped when some
+        # fetch failed: the next complete sync sweeps them instead.
+        deleted_count = sweep_projects(generation) if complete else 0
+
+    message = f"Sync Complete. Added {len(created_urls)} new. Updated {count_updated} existing."
+    if deleted_count > 0:
+        message += f" Removed {deleted_count} deleted repositories."
+    if deferred:
+        message += f" Deferred {len(deferred)} language fetches until the GitHub rate limit resets."
+    return message
+
+
+def sweep_projects(generation):
+    # Deletes every project older than `generation` with one DELETE per
+    # table (languages, tags, samples, rollups, projects).
+    # The public stale.delete() cannot do this: Project has post_delete
+    # receivers (cache invalidation and the search index, see signals.py),
+    # so it would load every stale row and send one signal per row.
+    # _raw_delete() is the single DELETE that delete() itself issues when
+    # no signals or cascades apply. It is private Django API, safe here
+    # because the related rows are removed just above and the caller
+    # invalidates the cache and the search index itself.
+    stale = Project.objects.filter(sync_generation__lt=generation)
+    ProjectLanguage.objects.filter(project__in=stale).delete()
+    Project.tags.through.objects.filter(project__in=stale).delete()
+    history.delete_for_projects(stale)
+    return stale._raw_delete(stale.db)
+
+
+def defer_language_fetches(repos):
+    # One INSERT queues a 'github_languages' job per repository, due when
+    # the rate limit window resets (see jobs.HANDLERS)
+    if not repos:
+        return
+    run_after = github.rate_limit.reset_at or timezone.now()
+    Job.objects.bulk_create([
+        Job(kind='github_languages', key=repo['languages_url'], payload=repo, run_after=run_after)
+        for repo in repos
+    ])
+
+
+# --- SINGLE REPOSITORY LANGUAGES ---
+def fetch_repository_languages(repo_data):
+    # Returns (result, state) for one repository; result is None when the
+    # repository has no languages_url
+    languages_url = repo_data.get('languages_url')
+    if not languages_url:
+        return None, None
+    if not github.is_api_url(languages_url):
+        # Payloads from webhooks or queued jobs are never fetched off GitHub
+        print(f"Skipping languages for {repo_data.get('name')}: {languages_url} is not a GitHub API URL")
+        return None, None
+    state = github.load_states([languages_url]).get(languages_url)
+    session = github.build_session()
+    try:
+        return github.fetch_languages(session, languages_url, state), state
+    finally:
+        github.close_session(session)
+
+
+def store_repository_languages(repo_data, result, state):
+    # Saves a 200/304 languages result; call inside a transaction
+    if result is None or result.error is not None or result.status_code not in (200, 304):
+        return
+    if result.status_code == 200:
+        save_languages({repo_data['html_url']: result.data})
+        history.record_samples(Project.objects.filter(github_url=repo_data['html_url']))
+    github.save_states([GitHubSyncState(
+        url=repo_data['languages_url'],
+        etag=result.etag or (state.etag if state else ''),
+        last_modified=result.last_modified or (state.last_modified if state else ''),
+        pushed_at=github.parse_pushed_at(repo_data.get('pushed_at')),
+    )])
+
+
+def raise_for_result(repo_name, result):
+    # Lets the job queue retry what could not be fetched: RateLimited jobs
+    # wait for the reset, anything else backs off
+    if result is None:
+        return
+    if isinstance(result.error, github.RateLimited):
+        raise result.error
+    if result.error is not None or result.status_code in (403, 429) or result.status_code >= 500:
+        raise SyncIncomplete(f"Languages for {repo_name} could not be fetched (status {result.status_code})")
+
+
+def sync_repository_languages(repo_data):
+    # Job handler for language fetches deferred by the rate limit
+    result, state = fetch_repository_languages(repo_data)
+    with transaction.atomic():
+        store_repository_languages(repo_data, result, state)
+        invalidate_content()
+    raise_for_result(repo_data['name'], result)
+
+
+# --- SINGLE REPOSITORY SYNC (push webhook) ---
+def sync_pushed_repository(repo_data):
+    repo_name = repo_data['name']
+    repo_url = repo_data['html_url']
+    repo_description = repo_data.get('description') or "No description provided."
+
+    # Fetch the specific languages for THIS repo (conditional on the ETag
+    # from the last sync, so a 304 is free)
+    result, state = fetch_repository_languages(repo_data)
+    if result is not None and result.error is not None:
+        print(f"Webhook Skill Sync Error: {result.error}")
+
+    with transaction.atomic():
+        # 1. Sync Project Info
+        created_urls, _ = upsert_projects([{
+            'github_url': repo_url,
+            'title': repo_name,
+            'description': repo_description,
+            'stars': 0,
+            'is_synced': True,
+        }], update_fields=['description'], tags=['GitHub', 'Auto-Synced'])
+        invalidate_content()
+        search.mark_stale()
+
+        # 2. SYNC SKILLS AUTOMATICALLY (Deep Sync Logic)
+        store_repository_languages(repo_data, result, state)
+
+    created = bool(created_urls)
+    if created:
+        print(f"Webhook: New project added - {repo_name}")
+    else:
+        print(f"Webhook: Project updated - {repo_name}")
+
+    # Project info is saved either way; raising lets the job queue retry the
+    # skills part later.
+    raise_for_result(repo_name, result)
+    return created
+
+
+def delete_repository(repo_data):
+    repo_url = repo_data.get('html_url')
+    if not repo_url:
+        return 0
+    deleted_count = Project.objects.filter(github_url=repo_url).delete()[0]
+    if deleted_count > 0:
+        print(f"Webhook: Deleted repository {repo_data.get('name')} from portfolio.")
+    return deleted_count
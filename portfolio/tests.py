@@ -1,3 +1,1372 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import runpy
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from email.utils import formatdate
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import (
+    cache, compression, fastjson, github as github_api, history, jobs, metrics, search, skills, snapshot, sync,
+    uploads, warmup, webhooks,
+)
+from .budgets import SESSION_QUERY_ALLOWANCE, budget_for
+from .cache import get_cache
+from .fake_github import FakeGitHub
+from .models import (
+    Profile, Project, ProjectLanguage, ProjectHistory, ProjectSample, Certificate, Skill, Tag, GitHubSyncState, Job,
+    WebhookDelivery,
+)
+from .serializers import ProfileSerializer, ProjectSerializer, CertificateSerializer, SkillSerializer
+from .views import ProfileViewSet, build_bootstrap_payload
+
+
+def view_query_count(captured):
+    # Queries charged to a view; only transaction statements are left out,
+    # as in metrics.timed_query
+    return sum(metrics.is_view_query(query['sql']) for query in captured)
+
+
+# Stands in for the Redis production runs with: a cache that answers
+# without SQL, so the counts below are the views' own queries. The DEBUG
+# DatabaseCache would add its round trips to every one of them.
+REDIS_LIKE_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+class FakeGitHubTests(TestCase):
+    def setUp(self):
+        self.github = FakeGitHub(repos=150).start()
+        self.addCleanup(self.github.stop)
+
+    def test_repo_list_is_paged_with_link_header(self):
+        response = requests.get(f"{self.github.url}/users/bench/repos?per_page=100")
+        self.assertEqual(len(response.json()), 100)
+        self.assertIn('rel="next"', response.headers['Link'])
+        last = requests.get(f"{self.github.url}/users/bench/repos?per_page=100&page=2")
+        self.assertEqual(len(last.json()), 50)
+        self.assertNotIn('Link', last.headers)
+
+    def test_etag_revalidation_and_rate_limit(self):
+        url = f"{self.github.url}/repos/bench/repo-1/languages"
+        first = requests.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = requests.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        self.github.rate_limit = 1
+        limited = requests.get(f"{self.github.url}/repos/bench/repo-2/languages")
+        self.assertEqual(limited.status_code, 403)
+        self.assertEqual(limited.headers['X-RateLimit-Remaining'], '0')
+
+
+class GitHubRateLimitTests(TestCase):
+    def setUp(self):
+        self.github = FakeGitHub(repos=250).start()
+        self.addCleanup(self.github.stop)
+        github_api.rate_limit.clear()
+        self.addCleanup(github_api.rate_limit.clear)
+        overrides = override_settings(
+            GITHUB_API_URL=self.github.url, GITHUB_RATE_LIMIT_RESERVE=10, GITHUB_MAX_RETRY_WAIT=1,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def sync(self):
+        with redirect_stdout(io.StringIO()):
+            return sync.sync_github_account(self.github.username)
+
+    def test_sync_follows_every_page(self):
+        self.github.rate_limit = 5000
+        with CaptureQueriesContext(connection) as captured:
+            self.sync()
+        # The rate limit is shared once per sync, not once per response
+        writes = [query['sql'] for query in captured if 'github-rate-limit' in str(query['sql'])]
+        self.assertEqual(len([sql for sql in writes if not sql.startswith('SELECT')]), 1)
+        self.assertEqual(get_cache().get('portfolio:github-rate-limit')[0], 5000 - 253)
+        self.assertEqual(Project.objects.count(), 250)
+        self.assertEqual(self.github.hits['list'], 3)
+        self.assertEqual(ProjectLanguage.objects.values('project').distinct().count(), 250)
+
+    def test_multi_page_listing_is_never_skipped(self):
+        self.github.repos = 150
+        self.sync()
+        # Deletions on page 2 leave page 1 (and its ETag) unchanged
+        self.github.repos = 120
+        message = self.sync()
+        self.assertIn("Removed 30 deleted repositories", message)
+        self.assertEqual(Project.objects.count(), 120)
+
+        # A single page still answers 304 when nothing changed
+        self.github.repos = 40
+        self.sync()
+        self.assertIn("No changes on GitHub", self.sync())
+
+    def test_sync_sweeps_only_after_a_complete_listing(self):
+        self.github.repos = 5
+        self.sync()
+        manual = Project.objects.create(github_url='https://example.com/manual', title='Manual', description='d')
+        self.github.repos = 3
+
+        # A failed language fetch keeps everything until a complete sync
+        self.github.touch(range(3))
+        failed = github_api.LanguagesResult(None, {}, Exception('boom'), '', '')
+        with mock.patch.object(github_api, 'fetch_languages', return_value=failed):
+            self.sync()
+        self.assertEqual(Project.objects.count(), 6)
+
+        with CaptureQueriesContext(connection) as captured:
+            message = self.sync()
+        self.assertIn("Removed 3 deleted repositories", message)
+        self.assertEqual(
+            sorted(Project.objects.values_list('title', flat=True)), ['repo-0', 'repo-1', 'repo-2'])
+        self.assertFalse(ProjectLanguage.objects.exclude(project__in=Project.objects.all()).exists())
+        self.assertFalse(Project.tags.through.objects.filter(project_id=manual.pk).exists())
+        deletes = [query['sql'] for query in captured if query['sql'].startswith('DELETE')]
+        self.assertEqual(sum('"portfolio_project"' in sql.split(' WHERE ')[0] for sql in deletes), 1)
+
+    def test_repeat_sync_only_asks_again_for_pushed_repositories(self):
+        self.github.repos = 20
+        self.sync()
+        self.assertEqual((self.github.hits['list'], self.github.hits['languages']), (1, 20))
+
+        # Nothing pushed: the listing answers 304 (free) and nothing else is sent
+        self.github.hits.clear()
+        self.assertIn("No changes on GitHub", self.sync())
+        self.assertEqual(dict(self.github.hits), {'list': 1, 'not_modified': 1})
+
+        # One push: only that repository's languages are asked for, with its
+        # ETag, and they have not changed
+        self.github.touch([3])
+        self.github.hits.clear()
+        self.sync()
+        self.assertEqual(self.github.hits['languages'], 1)
+        self.assertEqual(self.github.hits['not_modified'], 1)
+        state = GitHubSyncState.objects.get(url=self.github.repo(3)['languages_url'])
+        self.assertEqual(state.pushed_at, self.github.pushed_at[3])
+        self.assertEqual(ProjectLanguage.objects.filter(project__title='repo-3').count(), 2)
+
+    def test_unchanged_repositories_are_only_restamped(self):
+        self.github.repos = 20
+        self.sync()
+        self.github.touch([0])
+        self.github.repos = 19
+        with CaptureQueriesContext(connection) as captured:
+            message = self.sync()
+        self.assertIn("Added 0 new. Updated 19 existing. Removed 1", message)
+        writes = [
+            query['sql'] for query in captured
+            if query['sql'].startswith(('INSERT INTO "portfolio_project"', 'UPDATE "portfolio_project"'))
+        ]
+        # One upsert restamps every listed row, with no id list
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT INTO "portfolio_project"'))
+        self.assertIn('ON CONFLICT', writes[0])
+        self.assertNotIn('"github_url" IN', writes[0])
+        self.assertEqual(Project.objects.values('sync_generation').distinct().count(), 1)
+
+    def test_languages_over_budget_are_deferred_to_the_reset(self):
+        self.github.rate_limit = 100
+        message = self.sync()
+
+        # 3 list pages + 87 language fetches leave the reserve of 10 untouched
+        self.assertEqual(self.github.hits['rate_limited'], 0)
+        self.assertEqual(Project.objects.count(), 250)
+        deferred = Job.objects.filter(kind='github_languages')
+        self.assertEqual(deferred.count(), 250 - 87)
+        self.assertIn(f"Deferred {250 - 87} language fetches", message)
+        reset_at = github_api.rate_limit.reset_at
+        self.assertEqual(reset_at.timestamp(), self.github.rate_limit_reset)
+        self.assertFalse(deferred.exclude(run_after=reset_at).exists())
+
+        # A job that runs before the window resets is put back untouched
+        job = deferred.first()
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(jobs.run_job(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 0))
+
+        # After the reset the queued fetches complete the skills
+        self.github.rate_limit = None
+        github_api.rate_limit.clear()
+        deferred.update(run_after=timezone.now())
+        with redirect_stdout(io.StringIO()):
+            jobs.run_pending()
+        self.assertEqual(ProjectLanguage.objects.values('project').distinct().count(), 250)
+
+    def test_languages_are_fetched_concurrently_in_input_order(self):
+        self.github.latency = 0.2
+        urls = [f"{self.github.url}/repos/bench/repo-{index}/languages" for index in (7, 3, 0, 5)]
+        # Missing on GitHub, and nothing listening at all
+        urls[1:1] = [f"{self.github.url}/repos/bench/repo-999/languages", 'http://127.0.0.1:9/languages']
+        session = github_api.build_session()
+        try:
+            with override_settings(GITHUB_SYNC_CONCURRENCY=8):
+                start = time.perf_counter()
+                results = github_api.fetch_all_languages(session, [(url, None) for url in urls])
+                elapsed = time.perf_counter() - start
+        finally:
+            github_api.close_session(session)
+
+        self.assertEqual([result.status_code for result in results], [200, 404, None, 200, 200, 200])
+        self.assertEqual([result.data for result in results if result.status_code == 200],
+                         [self.github.languages(index) for index in (7, 3, 0, 5)])
+        # One failure is returned in its own slot and spoils nothing else
+        self.assertIsNotNone(results[2].error)
+        self.assertEqual(results[2].data, {})
+        self.assertTrue(all(result.error is None for index, result in enumerate(results) if index != 2))
+        # Five 0.2s responses in parallel, not one after another
+        self.assertLess(elapsed, 0.8)
+
+    def test_late_response_does_not_raise_the_count(self):
+        reset = str(self.github.rate_limit_reset)
+        for remaining in ('20', '25'):
+            github_api.rate_limit.update(mock.Mock(headers={
+                'X-RateLimit-Remaining': remaining, 'X-RateLimit-Reset': reset,
+            }))
+        self.assertEqual(github_api.rate_limit.available(), 10)
+        # A new window starts from GitHub's count again
+        github_api.rate_limit.update(mock.Mock(headers={
+            'X-RateLimit-Remaining': '25', 'X-RateLimit-Reset': str(self.github.rate_limit_reset + 3600),
+        }))
+        self.assertEqual(github_api.rate_limit.available(), 15)
+
+    def test_short_retry_after_is_waited_out(self):
+        self.github.throttle = 1
+        session = github_api.build_session()
+        result = github_api.fetch_languages(session, f"{self.github.url}/repos/bench/repo-1/languages")
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(self.github.hits['throttled'], 1)
+
+        self.github.throttle, self.github.throttle_wait = 1, 60
+        result = github_api.fetch_languages(session, f"{self.github.url}/repos/bench/repo-2/languages")
+        self.assertIsInstance(result.error, github_api.RateLimited)
+
+    def test_retry_after_in_seconds_or_as_a_date(self):
+        def delay(**headers):
+            return github_api.retry_delay(mock.Mock(status_code=429, headers=headers))
+
+        now = time.time()
+        self.assertEqual(delay(**{'Retry-After': '30'}), 30)
+        self.assertIn(delay(**{'Retry-After': formatdate(now + 90, usegmt=True)}), (89, 90, 91))
+        self.assertEqual(delay(**{'Retry-After': formatdate(now - 90, usegmt=True)}), 0)
+        # Unreadable values fall back to the rate limit reset
+        reset = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(now) + 60)}
+        self.assertIn(delay(**{'Retry-After': 'soon'}, **reset), (59, 60))
+        self.assertIsNone(delay(**{'Retry-After': 'soon'}))
+
+    def test_token_and_rate_limit_stay_with_the_github_api(self):
+        with FakeGitHub(repos=3, rate_limit=0) as foreign, override_settings(GITHUB_TOKEN='secret'):
+            session = github_api.build_session()
+            foreign_url = f"{foreign.url}/repos/bench/repo-1/languages"
+            github_api.fetch_languages(session, foreign_url)
+            self.assertEqual(foreign.authorized, 0)
+            # The foreign X-RateLimit-Remaining: 0 is ignored
+            self.assertIsNone(github_api.rate_limit.available())
+
+            github_api.fetch_languages(session, f"{self.github.url}/repos/bench/repo-1/languages")
+            self.assertEqual(self.github.authorized, 1)
+
+            # Payload URLs off the API are neither queued nor fetched
+            repo = dict(self.github.repo(1), languages_url=foreign_url)
+            body = json.dumps({'repository': repo, 'pusher': {'name': 'x'}}).encode()
+            data, status_code = webhooks.queue_event('push', 'foreign-1', body)
+            self.assertEqual(status_code, 400)
+            self.assertFalse(Job.objects.exists())
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(sync.fetch_repository_languages(repo), (None, None))
+            self.assertEqual(foreign.hits['languages'], 1)
+
+
+class SetBasedWriteTests(TestCase):
+    def rows(self, count, stars=0):
+        return [{
+            'github_url': f'https://github.com/o/repo-{index}', 'title': f'repo-{index}',
+            'description': 'D', 'stars': stars, 'is_synced': True,
+        } for index in range(count)]
+
+    def test_upsert_writes_only_new_and_changed_rows(self):
+        created, existing = sync.upsert_projects(self.rows(3), update_fields=['stars'], tags=['GitHub'])
+        self.assertEqual((len(created), existing), (3, 0))
+        self.assertEqual(Tag.objects.get(name='GitHub').projects.count(), 3)
+
+        # Unchanged: one SELECT, nothing written
+        with CaptureQueriesContext(connection) as captured:
+            created, existing = sync.upsert_projects(self.rows(3), update_fields=['stars'], tags=['GitHub'])
+        self.assertEqual((created, existing), ([], 3))
+        self.assertEqual(len(captured), 1)
+
+        # One repository gained a star: only its row goes to the upsert
+        rows = self.rows(3)
+        rows[1]['stars'] = 1
+        rows[1]['title'] = 'renamed'
+        with CaptureQueriesContext(connection) as captured:
+            sync.upsert_projects(rows, update_fields=['stars'])
+        writes = [query['sql'] for query in captured if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0].count('https://github.com/o/'), 1)
+        # Fields left out of update_fields keep their value
+        self.assertEqual(Project.objects.get(github_url=rows[1]['github_url']).title, 'repo-1')
+
+    def test_languages_are_saved_in_a_fixed_number_of_queries(self):
+        Skill.objects.create(name='Python', category='Tools')
+        counts = set()
+        for size in (2, 20):
+            Project.objects.all().delete()
+            rows = self.rows(size)
+            sync.upsert_projects(rows, update_fields=['stars'])
+            languages = {row['github_url']: {'Python': 100, 'Go': 50} for row in rows}
+            with CaptureQueriesContext(connection) as captured:
+                sync.save_languages(languages)
+            counts.add(len(captured))
+            self.assertEqual(ProjectLanguage.objects.count(), 2 * size)
+        self.assertEqual(len(counts), 1, counts)
+        # One row per language, and an existing skill is left as it was
+        self.assertEqual(dict(Skill.objects.values_list('name', 'category')), {'Python': 'Tools', 'Go': 'Backend'})
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        handlers = mock.patch.dict(jobs.HANDLERS, {
+            'record': self.calls.append, 'fail': mock.Mock(side_effect=RuntimeError('boom')),
+        })
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def run_pending(self):
+        with redirect_stdout(io.StringIO()):
+            return jobs.run_pending()
+
+    def test_jobs_for_one_key_coalesce_into_the_newest(self):
+        pushes = [jobs.enqueue('record', 'repo-a', {'push': index}) for index in range(3)]
+        jobs.enqueue('record', 'repo-b', {'push': 'b'})
+        self.assertEqual(self.run_pending(), (2, 2))
+        self.assertEqual(self.calls, [{'push': 2}, {'push': 'b'}])
+        for job in pushes[:2]:
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.last_error), (Job.DONE, f"Coalesced into job #{pushes[2].pk}"))
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_jobs_not_yet_due_wait(self):
+        jobs.enqueue('record', 'later', {}, run_after=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(self.run_pending(), (0, 0))
+        self.assertEqual(Job.objects.get().status, Job.PENDING)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BACKOFF=30)
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue('fail', 'k', {})
+        self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.PENDING, 1, 'boom'))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_rate_limited_job_waits_for_the_reset_without_an_attempt(self):
+        reset_at = timezone.now() + timedelta(minutes=30)
+        job = Job.objects.create(kind='fail', key='k', payload={})
+        with mock.patch.dict(jobs.HANDLERS, {'fail': mock.Mock(side_effect=github_api.RateLimited(reset_at))}):
+            self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.run_after), (Job.PENDING, 0, reset_at))
+
+    def test_jobs_of_a_dead_worker_are_requeued(self):
+        stale = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT + 1)
+        Job.objects.create(kind='record', key='k', payload={'n': 1}, status=Job.RUNNING, locked_at=stale)
+        Job.objects.create(kind='record', key='other', payload={'n': 2}, status=Job.RUNNING, locked_at=timezone.now())
+        self.assertEqual(self.run_pending(), (1, 0))
+        self.assertEqual(self.calls, [{'n': 1}])
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='secret')
+class WebhookTests(TestCase):
+    PAYLOAD = json.dumps({
+        'repository': {
+            'name': 'repo', 'html_url': 'https://github.com/owner/repo',
+            'languages_url': 'https://api.github.com/repos/owner/repo/languages',
+        },
+        'pusher': {'name': 'owner'},
+    })
+
+    def post(self, body=PAYLOAD, event='push', delivery='d-1', signature=None, path='/webhook/github/'):
+        headers = {'X-GitHub-Event': event, 'X-GitHub-Delivery': delivery}
+        if signature is None:
+            signature = webhooks.sign(body.encode(), 'secret')
+        if signature:
+            headers['X-Hub-Signature-256'] = signature
+        return self.client.post(path, data=body, content_type='application/json', headers=headers)
+
+    def test_signature_is_required(self):
+        self.assertEqual(self.post(signature='sha256=' + '0' * 64).status_code, 403)
+        self.assertEqual(self.post(signature='').status_code, 403)
+        # Signed with another secret
+        self.assertEqual(self.post(signature=webhooks.sign(self.PAYLOAD.encode(), 'other')).status_code, 403)
+        with override_settings(GITHUB_WEBHOOK_SECRET=''):
+            self.assertEqual(self.post().status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+        self.assertEqual(self.post().status_code, 202)
+        self.assertEqual(list(Job.objects.values_list('kind', 'key')), [('github_push', 'https://github.com/owner/repo')])
+
+    def test_redelivery_is_dropped(self):
+        self.assertEqual(self.post().status_code, 202)
+        # Same X-GitHub-Delivery, through either view
+        for path in ('/webhook/github/', '/webhook/github/async/'):
+            response = self.post(path=path)
+            self.assertEqual((response.status_code, response.json()['status']), (200, 'duplicate'))
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(self.post(delivery='d-2').status_code, 202)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_deliveries_are_forgotten_after_their_ttl(self):
+        self.assertEqual(self.post().status_code, 202)
+        self.post(delivery='d-2')
+        expired = timezone.now() - timedelta(seconds=settings.GITHUB_WEBHOOK_DELIVERY_TTL + 1)
+        WebhookDelivery.objects.filter(delivery_id='d-1').update(received_at=expired)
+        self.assertEqual(webhooks.evict_expired_deliveries(), 1)
+        self.assertEqual(list(WebhookDelivery.objects.values_list('delivery_id', flat=True)), ['d-2'])
+        # An id past its TTL is no longer recognised as a redelivery
+        self.assertEqual(self.post().status_code, 202)
+
+    def test_unhandled_events_are_dropped_before_the_body_is_read(self):
+        with mock.patch.object(webhooks, 'verify_signature') as verify:
+            response = self.post(body='not json', event='star', signature='')
+        self.assertEqual(response.json()['status'], 'ignored')
+        verify.assert_not_called()
+        self.assertFalse(Job.objects.exists())
+
+
+class SkillCategorizerTests(SimpleTestCase):
+    def test_aliases_match_whole_words_only(self):
+        for name, category in (
+            ('Go', 'Backend'), ('Go Template', 'Backend'), ('Vue.js', 'Frontend'), ('Python console', 'Backend'),
+            ('GNU Make', 'Tools'), ('MongoDB', 'Soft'), ('Gosu', 'Soft'), ('Cargo', 'Soft'), ('', 'Soft'), (None, 'Soft'),
+        ):
+            self.assertEqual(skills.get_skill_category(name), category, name)
+
+    def test_exact_names_win_over_aliases(self):
+        categorizer = skills.SkillCategorizer(
+            {'Tools': ['Python Console']}, {'Backend': ['python'], 'Frontend': ['console']},
+        )
+        self.assertEqual(categorizer.categorize('python console'), 'Tools')
+        self.assertEqual(categorizer.categorize('Python REPL'), 'Backend')
+        # The first category listing a name (or alias) keeps it
+        categorizer = skills.SkillCategorizer({'Backend': ['sql'], 'Data': ['sql']}, {'Data': ['query'], 'Tools': ['query']})
+        self.assertEqual(categorizer.categorize('SQL'), 'Backend')
+        self.assertEqual(categorizer.categorize('Query Language'), 'Data')
+
+    def test_settings_replace_categories(self):
+        with override_settings(
+            SKILL_CATEGORIES={'Backend': ['python'], 'Data': ['r', 'julia']},
+            SKILL_CATEGORY_ALIASES={'Tools': ['terraform']},
+        ):
+            self.assertEqual(skills.get_skill_category('R'), 'Data')
+            self.assertEqual(skills.get_skill_category('Julia'), 'Data')
+            self.assertEqual(skills.get_skill_category('Terraform HCL'), 'Tools')
+            # Categories the settings leave out keep their defaults
+            self.assertEqual(skills.get_skill_category('TypeScript'), 'Frontend')
+            self.assertEqual(skills.get_skill_category('Java'), 'Backend')
+        self.assertEqual(skills.get_skill_category('R'), 'Backend')
+        self.assertEqual(skills.get_skill_category('Terraform HCL'), 'Soft')
+
+
+class SearchIndexTests(TestCase):
+    # SQLite runs the in-process InvertedIndex fallback
+    @classmethod
+    def setUpTestData(cls):
+        tags = {name: Tag.objects.create(name=name) for name in ('Python', 'Django')}
+        cls.titled = Project.objects.create(github_url='https://github.com/o/a', title='Django Portfolio', description='Personal site')
+        cls.titled.tags.add(tags['Python'])
+        cls.tagged = Project.objects.create(github_url='https://github.com/o/b', title='Blog', description='Posts')
+        cls.tagged.tags.add(tags['Django'])
+        cls.described = Project.objects.create(github_url='https://github.com/o/c', title='Notes', description='A django app')
+        Project.objects.create(github_url='https://github.com/o/d', title='Portfolios', description='Templates')
+        Certificate.objects.create(name='Django Developer', issuer='Django Software Foundation', issue_date=date(2025, 1, 1))
+
+    def setUp(self):
+        get_cache().clear()
+
+    def results(self, q):
+        return [(result['type'], result['title'], result['score']) for result in search.search(q)]
+
+    def test_fields_are_weighted_and_every_term_must_match(self):
+        self.assertEqual(self.results('django'), [
+            ('certificate', 'Django Developer', 1.4),
+            ('project', 'Django Portfolio', 1.0),
+            ('project', 'Blog', 0.6),
+            ('project', 'Notes', 0.4),
+        ])
+        self.assertEqual(self.results('Django blog'), [('project', 'Blog', 1.6)])
+        self.assertEqual(self.results('django missing'), [])
+        self.assertEqual(self.results('!!'), [])
+
+    def test_prefixes_match_at_half_weight(self):
+        self.assertEqual(self.results('portfolio'), [
+            ('project', 'Django Portfolio', 1.0),
+            ('project', 'Portfolios', 0.5),
+        ])
+        self.assertEqual([title for _, title, _ in self.results('port')], ['Django Portfolio', 'Portfolios'])
+
+    def test_model_changes_update_the_index(self):
+        self.results('django')
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='Django', category='Backend')
+            self.described.delete()
+        self.assertEqual(
+            [(kind, title) for kind, title, _ in self.results('django')],
+            [('certificate', 'Django Developer'), ('project', 'Django Portfolio'), ('skill', 'Django'), ('project', 'Blog')],
+        )
+
+    def test_change_from_another_process_forces_a_rebuild(self):
+        self.results('blog')
+        # Another worker renames a project: its version bump reaches the
+        # shared cache, its signals never reach this process's index
+        Project.objects.filter(pk=self.tagged.pk).update(title='Diary')
+        cache.bump_content_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(github_url='https://github.com/o/e', title='Diary Two', description='More posts')
+        self.assertEqual(search.index.version, None)
+        self.assertEqual(self.results('blog'), [])
+        self.assertEqual(sorted(title for _, title, _ in self.results('diary')), ['Diary', 'Diary Two'])
+
+    def test_bulk_writes_need_mark_stale(self):
+        self.results('blog')
+        Project.objects.filter(pk=self.tagged.pk).update(title='Diary')
+        # update() sends no signals and leaves the content version alone
+        self.assertEqual([title for _, title, _ in self.results('blog')], ['Blog'])
+        with self.captureOnCommitCallbacks(execute=True):
+            search.mark_stale()
+        self.assertEqual(self.results('blog'), [])
+        self.assertEqual([title for _, title, _ in self.results('diary')], ['Diary'])
+
+    def test_sync_rebuilds_the_index(self):
+        self.results('repo')
+        with FakeGitHub(repos=3) as github, override_settings(GITHUB_API_URL=github.url):
+            for repos in (3, 2):
+                github.repos = repos
+                with redirect_stdout(io.StringIO()), self.captureOnCommitCallbacks(execute=True):
+                    sync.sync_github_account(github.username)
+                titles = sorted(title for _, title, _ in self.results('repo'))
+                self.assertEqual(titles, [f'repo-{index}' for index in range(repos)])
+        # Synced projects are tagged GitHub and found through their tags
+        self.assertEqual(len(self.results('github benchmark')), 2)
+
+
+class ValuesFastPathTests(TestCase):
+    # The values()/orjson list path must answer with exactly the bytes the
+    # serializers and DRF's JSONRenderer produce
+    PATHS = (
+        '/api/projects/',
+        '/api/projects/?ordering=-stars&page_size=2',
+        '/api/projects/?ordering=created_at&fields=id,tags_list,created_at',
+        '/api/projects/?tag=Django',
+        '/api/certificates/',
+        '/api/certificates/?fields=name,issue_date&page_size=1',
+        '/api/skills/?ordering=-bytes',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('owner')
+        Profile.objects.create(user=user, full_name='Zoë \u2028 Doe', bio='Line\u2029break "quoted" \\ <b>', email='z@example.com')
+        tags = [Tag.objects.create(name=name) for name in ('Python', 'Django', 'Ünïcode')]
+        skills = [Skill.objects.create(name=name, category=category) for name, category in (('Python', 'Backend'), ('Go', 'Backend'), ('CSS', 'Frontend'))]
+        for index in range(5):
+            project = Project.objects.create(
+                github_url=f'https://github.com/owner/p{index}', title=f'Project {index} \u2028',
+                description='😀 emoji\nnew line\ttab', stars=index * 7 % 3,
+            )
+            project.tags.set(tags[index % 3:])
+            ProjectLanguage.objects.create(project=project, skill=skills[index % 3], bytes=10 ** (index + 8))
+            Certificate.objects.create(name=f'Cert {index}', issuer='Issuer', issue_date=date(2024, 1 + index, 2))
+        # Microseconds and whole seconds both have to format like DRF
+        Project.objects.filter(pk=project.pk).update(created_at=timezone.now().replace(microsecond=0))
+
+    def get(self, path, **extra):
+        get_cache().clear()
+        return self.client.get(path, HTTP_ACCEPT='application/json', **extra).content
+
+    def test_lists_match_the_serializers(self):
+        for path in self.PATHS:
+            fast = self.get(path)
+            with mock.patch('portfolio.views.is_cacheable_request', return_value=False):
+                slow = self.get(path)
+            self.assertEqual(fast, slow, path)
+        self.assertIn(b'Project 0 \\u2028', self.get('/api/projects/'))
+
+    def test_ties_are_broken_by_id_across_pages(self):
+        # Every project in setUpTestData has 0, 1 or 2 stars
+        for ordering, expected in (('-stars', ['-stars', '-id']), ('stars', ['stars', 'id'])):
+            seen, path = [], f'/api/projects/?ordering={ordering}&page_size=2'
+            while path:
+                page = json.loads(self.get(path))
+                seen += [(row['stars'], row['id']) for row in page['results']]
+                path = page['next']
+            rows = Project.objects.order_by(*expected).values_list('stars', 'id')
+            self.assertEqual(seen, list(rows), ordering)
+            # SQLite happens to return ties in id order anyway; the query
+            # has to ask for it
+            with CaptureQueriesContext(connection) as captured:
+                self.get(f'/api/projects/?ordering={ordering}')
+            direction = 'DESC' if ordering.startswith('-') else 'ASC'
+            self.assertTrue(any(
+                re.search(rf'FROM "portfolio_project" ORDER BY \S+ {direction}, \S+ {direction} LIMIT', query['sql'])
+                for query in captured
+            ), ordering)
+
+    def test_async_lists_match(self):
+        client = AsyncClient()
+        for path in self.PATHS:
+            get_cache().clear()
+            fast = async_to_sync(client.get)(path.replace('/api/', '/api/async/')).content
+            self.assertEqual(fast, self.get(path).replace(b'/api/', b'/api/async/'), path)
+
+    def test_async_details_match(self):
+        client = AsyncClient()
+        project, certificate = Project.objects.first().pk, Certificate.objects.first().pk
+        for path in (f'/api/projects/{project}/', f'/api/certificates/{certificate}/', '/api/bootstrap/',
+                     '/api/projects/0/', '/api/certificates/0/'):
+            expected = self.client.get(path, HTTP_ACCEPT='application/json')
+            response = async_to_sync(client.get)(path.replace('/api/', '/api/async/'))
+            self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content), path)
+            if expected.status_code == 200:
+                # Same content version behind both ETags
+                self.assertEqual(response['ETag'].split('-')[0], expected['ETag'].split('-')[0], path)
+                revalidated = async_to_sync(client.get)(
+                    path.replace('/api/', '/api/async/'), headers={'If-None-Match': response['ETag']})
+                self.assertEqual(revalidated.status_code, 304, path)
+        self.assertEqual(async_to_sync(client.post)('/api/async/projects/').status_code, 405)
+
+    def test_bootstrap_matches_the_serializers(self):
+        grouped = {}
+        for skill in SkillSerializer(Skill.objects.with_usage().order_by('-bytes', 'id'), many=True).data:
+            grouped.setdefault(skill['category'], []).append(skill)
+        expected = JSONRenderer().render({
+            'profile': ProfileSerializer(Profile.objects.first()).data,
+            'skills': grouped,
+            'projects': ProjectSerializer(
+                Project.objects.prefetch_related('tags').order_by('-created_at', '-id'), many=True).data,
+            'certificates': CertificateSerializer(Certificate.objects.order_by('-issue_date', '-id'), many=True).data,
+        })
+        self.assertEqual(self.get('/api/bootstrap/'), expected)
+        self.assertEqual(fastjson.dumps(build_bootstrap_payload()), expected)
+        with mock.patch.object(fastjson, 'orjson', None):
+            self.assertEqual(fastjson.dumps(build_bootstrap_payload()), expected)
+
+
+class BootstrapTests(TestCase):
+    def get(self):
+        response = self.client.get('/api/bootstrap/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_empty_site_gets_empty_sections(self):
+        data = self.get()
+        self.assertEqual((data['skills'], data['projects'], data['certificates']), ({}, [], []))
+
+    def test_skills_are_grouped_by_category_in_bytes_order(self):
+        project = Project.objects.create(github_url='https://github.com/o/p', title='P', description='D')
+        for name, category, size in (('Go', 'Backend', 10), ('CSS', 'Frontend', 30), ('Python', 'Backend', 20)):
+            ProjectLanguage.objects.create(project=project, skill=Skill.objects.create(name=name, category=category), bytes=size)
+        skills = self.get()['skills']
+        self.assertEqual({category: [skill['name'] for skill in rows] for category, rows in skills.items()},
+                         {'Frontend': ['CSS'], 'Backend': ['Python', 'Go']})
+
+    @override_settings(HOME_SSR=False)
+    def test_home_page_loads_everything_with_one_call(self):
+        page = self.client.get('/').content.decode()
+        fetched = re.findall(r"fetch\('(/api/[^']*)'", page)
+        self.assertIn('/api/bootstrap/', fetched)
+        self.assertFalse({'/api/skills/', '/api/projects/', '/api/certificates/'} & set(fetched))
+        self.assertNotIn('id="bootstrap-data"', page)
+
+
+@override_settings(HOME_SSR=True, CACHES=REDIS_LIKE_CACHES)
+class HomePageTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('owner', is_staff=True)
+        Profile.objects.create(user=self.user, bio='Bio', email='owner@example.com')
+        self.project = Project.objects.create(github_url='https://github.com/o/p', title='Alpha', description='D')
+
+    def test_cached_render_runs_no_queries(self):
+        first = self.client.get('/').content.decode()
+        self.assertIn('Alpha', first)
+        self.assertIn('id="bootstrap-data"', first)
+        with CaptureQueriesContext(connection) as captured:
+            again = self.client.get('/').content.decode()
+        self.assertEqual(len(captured), 0)
+        self.assertEqual(again, first)
+
+    def test_writes_refresh_the_fragments(self):
+        self.assertIn('Alpha', self.client.get('/').content.decode())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = 'Beta'
+            self.project.save()
+        page = self.client.get('/').content.decode()
+        self.assertIn('Beta', page)
+        self.assertNotIn('Alpha', page)
+
+    def test_admin_toolbar_is_never_cached(self):
+        toolbar = '<a href="/admin/" class="btn">Admin Panel</a>'
+        self.assertNotIn(toolbar, self.client.get('/').content.decode())
+        self.client.force_login(self.user)
+        self.assertIn(toolbar, self.client.get('/').content.decode())
+        self.client.logout()
+        self.assertNotIn(toolbar, self.client.get('/').content.decode())
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        user = User.objects.create_user('owner', password='pw', is_staff=True)
+        Profile.objects.create(user=user, full_name='Owner', bio='Bio', email='owner@example.com')
+        for index in range(3):
+            Project.objects.create(github_url=f'https://github.com/owner/p{index}', title=f'P{index}', description='d')
+        get_cache().clear()
+
+    def export(self):
+        with override_settings(SNAPSHOT_ROOT=self.root), redirect_stdout(io.StringIO()):
+            return snapshot.export_snapshot()
+
+    def test_export_matches_the_live_site(self):
+        manifest = self.export()
+        current = os.path.join(self.root, 'current')
+        with open(os.path.join(current, 'index.html'), 'rb') as fh:
+            self.assertEqual(fh.read(), self.client.get('/').content)
+        with open(os.path.join(current, manifest['files']['projects'].lstrip('/')), 'rb') as fh:
+            exported = json.loads(fh.read())
+        live = self.client.get('/api/projects/', HTTP_ACCEPT='application/json').json()['results']
+        self.assertEqual(exported, live)
+        self.assertTrue(os.path.exists(os.path.join(current, 'index.html.gz')))
+
+        # Publishing swaps `current`; only SNAPSHOT_KEEP releases stay
+        for _ in range(3):
+            self.export()
+        self.assertEqual(len(os.listdir(os.path.join(self.root, 'releases'))), settings.SNAPSHOT_KEEP)
+
+    def test_anonymous_visitors_get_the_snapshot(self):
+        manifest = self.export()
+        with override_settings(SNAPSHOT_SERVE=True, SNAPSHOT_ROOT=self.root):
+            client = Client()
+            with CaptureQueriesContext(connection) as captured:
+                home = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+                data = client.get(manifest['files']['projects'])
+            self.assertEqual(view_query_count(captured), 0)
+            self.assertEqual(home['Content-Encoding'], 'gzip')
+            self.assertIn('Cookie', home['Vary'])
+            self.assertIn('immutable', data['Cache-Control'])
+
+            client.login(username='owner', password='pw')
+            live = client.get('/')
+            self.assertEqual(live.status_code, 200)
+            self.assertNotIn('Content-Encoding', live)
+
+    def test_changes_schedule_one_export(self):
+        with override_settings(SNAPSHOT_ENABLED=True, SNAPSHOT_ROOT=self.root):
+            for index in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Project.objects.filter(pk=Project.objects.first().pk).update(stars=index)
+                    sync.invalidate_content()
+            scheduled = Job.objects.filter(kind='export_snapshot')
+            self.assertEqual(scheduled.count(), 1)
+
+            scheduled.update(run_after=timezone.now())
+            with redirect_stdout(io.StringIO()):
+                jobs.run_pending()
+            self.assertTrue(os.path.exists(os.path.join(self.root, 'current', 'index.html')))
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('owner')
+        Profile.objects.create(user=user, bio='Bio', email='owner@example.com')
+        for index in range(30):
+            Project.objects.create(github_url=f'https://github.com/owner/p{index}', title=f'P{index}', description='d' * 50)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_negotiation_follows_server_preference_and_q_values(self):
+        preference = ['br', 'zstd', 'gzip']
+        self.assertEqual(compression.negotiate('gzip, deflate, br, zstd', preference), 'br')
+        self.assertEqual(compression.negotiate('gzip;q=1.0, br;q=0', preference), 'gzip')
+        self.assertEqual(compression.negotiate('zstd', preference), 'zstd')
+        self.assertEqual(compression.negotiate('*;q=0.5', ['gzip']), 'gzip')
+        self.assertIsNone(compression.negotiate('identity', preference))
+        self.assertIsNone(compression.negotiate('', preference))
+
+    def test_payload_is_compressed_once_per_etag(self):
+        codec = mock.Mock(side_effect=compression.compress_gzip)
+        with mock.patch.dict(compression.CODECS, {'gzip': codec}), override_settings(COMPRESSION_ENCODINGS=['gzip']):
+            first = self.client.get('/api/projects/', HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get('/api/projects/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(codec.call_count, 1)
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        self.assertIn('Accept-Encoding', first['Vary'])
+        plain = self.client.get('/api/projects/')
+        self.assertEqual(gzip.decompress(first.content), plain.content)
+
+        # The weak ETag still revalidates to a 304
+        revalidated = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=first['ETag'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_pages_without_etag_are_gzipped_per_request(self):
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class CacheInvalidationTests(TestCase):
+    # The content version lives in the shared cache, so a write through any
+    # process makes every cached payload and ETag stale
+    def setUp(self):
+        get_cache().clear()
+        user = User.objects.create_user('owner', is_staff=True, is_superuser=True)
+        self.project = Project.objects.create(github_url='https://github.com/owner/p', title='Before', description='D')
+        self.client.force_login(user)
+
+    def get(self, path, **extra):
+        return self.client.get(path, HTTP_ACCEPT='application/json', **extra)
+
+    def test_write_invalidates_list_and_retrieve(self):
+        paths = ('/api/projects/', f'/api/projects/{self.project.pk}/')
+        before = {path: self.get(path) for path in paths}
+        for path, response in before.items():
+            self.assertIn(b'Before', response.content)
+            self.assertEqual(self.get(path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/projects/{self.project.pk}/', data={'title': 'After'}, content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        for path, old in before.items():
+            response = self.get(path, HTTP_IF_NONE_MATCH=old['ETag'])
+            self.assertEqual(response.status_code, 200, path)
+            self.assertNotEqual(response['ETag'], old['ETag'])
+            self.assertIn(b'After', response.content)
+            self.assertNotIn(b'Before', response.content)
+
+    def test_matching_etag_gets_an_empty_304_in_one_round_trip(self):
+        for path in ('/api/projects/', f'/api/projects/{self.project.pk}/', '/api/bootstrap/', '/api/async/projects/'):
+            get = async_to_sync(AsyncClient().get) if '/async/' in path else self.client.get
+            etag = get(path, headers={'Accept': 'application/json'})['ETag']
+            for header in (etag, f'W/{etag}', f'"other", {etag}'):
+                with CaptureQueriesContext(connection) as captured:
+                    response = get(path, headers={'Accept': 'application/json', 'If-None-Match': header})
+                self.assertEqual(response.status_code, 304, path)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+                # One round trip: the content version lookup, here in the
+                # DatabaseCache table
+                self.assertEqual(view_query_count(captured), 1, path)
+                self.assertIn(f'"{settings.CACHE_TABLE}"', captured[0]['sql'])
+
+        etag = self.get('/api/bootstrap/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Certificate.objects.create(name='New', issuer='Issuer', issue_date=date(2025, 1, 1))
+        response = self.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_version_is_stored_where_every_process_reads_it(self):
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.db.DatabaseCache')
+        self.get('/api/projects/')
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT cache_key FROM "{settings.CACHE_TABLE}"')
+            keys = {row[0] for row in cursor.fetchall()}
+        self.assertIn(get_cache().make_key(cache.VERSION_KEY), keys)
+
+    def test_redis_is_required_outside_debug(self):
+        path = os.path.join(settings.BASE_DIR, 'myproject', 'settings.py')
+        with mock.patch.dict(os.environ, {'DEBUG': 'False'}):
+            os.environ.pop('REDIS_URL', None)
+            with self.assertRaisesMessage(ImproperlyConfigured, 'REDIS_URL'):
+                runpy.run_path(path)
+            os.environ['REDIS_URL'] = 'redis://localhost:6379/0'
+            self.assertEqual(runpy.run_path(path)['CACHES']['default']['BACKEND'],
+                             'django.core.cache.backends.redis.RedisCache')
+
+
+@override_settings(CACHES=REDIS_LIKE_CACHES)
+class WarmUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('owner')
+        Profile.objects.create(user=user, bio='Bio', email='owner@example.com')
+        Project.objects.create(github_url='https://github.com/owner/p', title='P', description='d')
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_warm_up_primes_the_response_cache(self):
+        with redirect_stdout(io.StringIO()):
+            timings = warmup.warm_up()
+        self.assertEqual(set(timings), {'db', *settings.WARMUP_PATHS})
+        # The first visitor's reads are cache hits
+        for path in ('/api/bootstrap/', '/api/projects/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path, HTTP_HOST=warmup.warmup_host())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(view_query_count(queries), 0, path)
+
+    def test_failed_page_does_not_stop_the_warm_up(self):
+        output = io.StringIO()
+        with override_settings(WARMUP_PATHS=['/missing/', '/api/profile/']), redirect_stdout(output):
+            timings = warmup.warm_up()
+        self.assertIn('GET /missing/ returned 404', output.getvalue())
+        self.assertIn('/api/profile/', timings)
+
+
+class HistoryTests(TestCase):
+    # Wednesday 10:00 UTC
+    NOW = datetime(2026, 3, 4, 10, 0, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(github_url='https://github.com/owner/p', title='P', description='d')
+        skill = Skill.objects.create(name='Python', category='Backend')
+        ProjectLanguage.objects.create(project=cls.project, skill=skill, bytes=100)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def record(self, stars, moment):
+        Project.objects.filter(pk=self.project.pk).update(stars=stars)
+        history.record_samples(Project.objects.filter(pk=self.project.pk), now=moment)
+
+    def test_rollups_keep_the_last_sample_of_each_bucket(self):
+        self.record(1, self.NOW)
+        self.record(2, self.NOW + timedelta(minutes=30))
+        Project.objects.filter(pk=self.project.pk).update(stars=5)
+        with self.assertNumQueries(4):
+            history.record_samples(Project.objects.filter(pk=self.project.pk), now=self.NOW + timedelta(hours=2))
+
+        self.assertEqual(ProjectSample.objects.count(), 3)
+        rollups = ProjectHistory.objects.filter(project=self.project).order_by('bucket')
+        hourly = rollups.filter(resolution=ProjectHistory.HOUR)
+        self.assertEqual([(row.bucket.hour, row.stars) for row in hourly], [(10, 2), (12, 5)])
+        daily = rollups.get(resolution=ProjectHistory.DAY)
+        self.assertEqual((daily.bucket, daily.stars, daily.languages), (datetime(2026, 3, 4, tzinfo=dt_timezone.utc), 5, {'Python': 100}))
+        weekly = rollups.get(resolution=ProjectHistory.WEEK)
+        self.assertEqual(weekly.bucket, datetime(2026, 3, 2, tzinfo=dt_timezone.utc))
+
+    def test_prune_drops_samples_and_fine_rollups_past_retention(self):
+        self.record(1, self.NOW - timedelta(days=30))
+        self.record(2, self.NOW)
+        history.prune(now=self.NOW)
+        self.assertEqual(list(ProjectSample.objects.values_list('stars', flat=True)), [2])
+        remaining = ProjectHistory.objects.values_list('resolution', 'stars')
+        self.assertEqual(sorted(remaining), [('day', 1), ('day', 2), ('hour', 2), ('week', 1), ('week', 2)])
+
+    def test_year_of_history_reads_daily_rollups(self):
+        today = history.bucket_start(timezone.now(), ProjectHistory.DAY)
+        ProjectHistory.objects.bulk_create([
+            ProjectHistory(project=self.project, resolution=resolution, bucket=today - step * index,
+                           stars=index, languages={'Python': index}, recorded_at=today)
+            for resolution, step in history.RESOLUTIONS.items()
+            for index in range(500)
+        ])
+        url = f'/api/projects/{self.project.pk}/history/'
+
+        data = self.client.get(url).json()
+        self.assertEqual(data['resolution'], 'day')
+        self.assertIn(len(data['points']), (365, 366))
+        self.assertEqual(data['points'][-1], {'time': format_utc(today), 'stars': 0, 'languages': {'Python': 0}})
+        self.assertEqual(self.client.get(url, {'days': 2}).json()['resolution'], 'hour')
+        weekly = self.client.get(url, {'days': 3000}).json()
+        self.assertEqual((weekly['resolution'], len(weekly['points'])), ('week', 429))
+        self.assertEqual(self.client.get(url, {'days': 30, 'resolution': 'week'}).json()['resolution'], 'week')
+
+        self.assertEqual(self.client.get(url, {'days': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'resolution': 'minute'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/projects/999999/history/').status_code, 404)
+
+    def test_sync_records_history_and_sweep_removes_it(self):
+        with FakeGitHub(repos=3) as github, override_settings(GITHUB_API_URL=github.url), redirect_stdout(io.StringIO()):
+            sync.sync_github_account(github.username)
+            github.repos = 2
+            sync.sync_github_account(github.username)
+        synced = Project.objects.exclude(pk=self.project.pk)
+        self.assertEqual(synced.count(), 2)
+        self.assertEqual(ProjectSample.objects.count(), 4)
+        self.assertFalse(ProjectHistory.objects.exclude(project__in=synced).exists())
+        sample = ProjectSample.objects.filter(project__title='repo-1').latest('recorded_at')
+        self.assertEqual((sample.stars, sample.languages), (1, {'JavaScript': 8000, 'CSS': 2000}))
+
+
+def format_utc(moment):
+    return moment.isoformat().replace('+00:00', 'Z')
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(UPLOAD_SPOOL_DIR=tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        user = User.objects.create_user('owner', is_staff=True)
+        self.profile = Profile.objects.create(
+            user=user, bio='Bio', email='owner@example.com', profile_pic='https://img.example.com/old.jpg',
+            **{field: f'https://img.example.com/old-{field}.jpg' for field in Profile.DERIVATIVE_FIELDS},
+        )
+        self.client.force_login(user)
+        self.uploader = mock.Mock()
+        patcher = mock.patch.object(uploads, 'get_uploader', return_value=self.uploader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self):
+        # Queues the upload; the executor is left out, as if the worker that
+        # took the request was recycled before the upload ran
+        with mock.patch.object(uploads, 'get_executor'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/api/profile/{self.profile.pk}/',
+                encode_multipart(BOUNDARY, {'profile_pic': SimpleUploadedFile('me.jpg', b'jpeg')}),
+                content_type=MULTIPART_CONTENT,
+            )
+        self.assertEqual(response.status_code, 202)
+        return Job.objects.get(kind='upload')
+
+    def test_failed_upload_is_kept_and_retried(self):
+        job = self.start()
+        path = job.payload['path']
+        self.assertTrue(os.path.exists(path))
+        claimed = jobs.claim(job.pk)
+        self.assertIsNone(jobs.claim(job.pk))
+
+        self.uploader.upload_large.side_effect = ConnectionError('Cloudinary is down')
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(jobs.run_job(claimed))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertTrue(os.path.exists(path))
+
+        self.uploader.upload_large.side_effect = None
+        self.uploader.upload_large.return_value = {
+            'secure_url': 'https://img.example.com/new.jpg',
+            'eager': [{'secure_url': 'https://img.example.com/new-thumb.jpg'}],
+        }
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with redirect_stdout(io.StringIO()):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertFalse(os.path.exists(path))
+        self.profile.refresh_from_db()
+        self.assertEqual(
+            [self.profile.profile_pic, *(getattr(self.profile, field) for field in Profile.DERIVATIVE_FIELDS)],
+            ['https://img.example.com/new.jpg', 'https://img.example.com/new-thumb.jpg', '', ''],
+        )
+
+    def test_admin_save_returns_before_the_upload_runs(self):
+        self.client.force_login(User.objects.create_superuser('admin'))
+        with mock.patch.object(uploads, 'get_executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/portfolio/certificate/add/', {
+                'name': 'Cert', 'issuer': 'Issuer', 'issue_date': '2025-01-01', 'source': 'Manual',
+                'credential_file_upload': SimpleUploadedFile('cert.pdf', b'%PDF' * 1000),
+            })
+        self.assertEqual(response.status_code, 302)
+        self.uploader.upload_large.assert_not_called()
+        certificate = Certificate.objects.get()
+        job = Job.objects.get(kind='upload')
+        self.assertEqual((job.payload['task'], job.payload['pk']), ('credential_file', certificate.pk))
+        executor.return_value.submit.assert_called_once_with(uploads.run_now, job.pk)
+        with open(job.payload['path'], 'rb') as spooled:
+            self.assertEqual(spooled.read(), b'%PDF' * 1000)
+
+        self.uploader.upload_large.return_value = {'secure_url': 'https://files.example.com/cert.pdf'}
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(jobs.run_job(jobs.claim(job.pk)))
+        self.assertEqual(self.uploader.upload_large.call_args.kwargs['chunk_size'], settings.UPLOAD_CHUNK_SIZE)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.credential_file, 'https://files.example.com/cert.pdf')
+        self.assertFalse(os.path.exists(job.payload['path']))
+
+    def test_picture_set_without_upload_drops_resized_copies(self):
+        url = f'/api/profile/{self.profile.pk}/'
+        self.client.patch(url, {'bio': 'New bio'}, content_type='application/json')
+        self.profile.refresh_from_db()
+        self.assertTrue(all(getattr(self.profile, field) for field in Profile.DERIVATIVE_FIELDS))
+
+        response = self.client.patch(url, {'profile_pic': 'https://img.example.com/typed.jpg'}, content_type='application/json')
+        self.assertEqual(response.json()['profile_pic'], 'https://img.example.com/typed.jpg')
+        self.assertEqual([response.json()[field] for field in Profile.DERIVATIVE_FIELDS], ['', '', ''])
+
+        # The admin saves through the model too, also with update_fields
+        profile = Profile.objects.get(pk=self.profile.pk)
+        Profile.objects.filter(pk=profile.pk).update(profile_pic_thumb='https://img.example.com/t.jpg')
+        profile.profile_pic = 'https://img.example.com/admin.jpg'
+        profile.save(update_fields=['profile_pic'])
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_pic_thumb, '')
+
+
+class MetricsViewTests(TestCase):
+    def test_scrape_needs_a_configured_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with override_settings(METRICS_TOKEN='scraper'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer other').status_code, 401)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scraper')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'pid="{os.getpid()}"', response.content.decode())
+
+
+class TagMigrationTests(TransactionTestCase):
+    # 0006 turns the old comma-separated Project.tags strings into Tag rows
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('portfolio', target)])
+        return executor.loader.project_state([('portfolio', target)]).apps
+
+    def tearDown(self):
+        call_command('migrate', 'portfolio', verbosity=0)
+
+    def test_comma_separated_tags_become_rows(self):
+        apps = self.migrate('0005_list_ordering_indexes')
+        OldProject = apps.get_model('portfolio', 'Project')
+        for index, tags in enumerate(('Django, Python', ' Python ,GitHub,, Python', '')):
+            OldProject.objects.create(
+                github_url=f'https://github.com/o/p{index}', title=f'P{index}', description='D', tags=tags,
+            )
+
+        apps = self.migrate('0006_tag')
+        MigratedProject = apps.get_model('portfolio', 'Project')
+        tags = {
+            project.title: [tag.name for tag in project.tags.order_by('name')]
+            for project in MigratedProject.objects.prefetch_related('tags')
+        }
+        self.assertEqual(tags, {'P0': ['Django', 'Python'], 'P1': ['GitHub', 'Python'], 'P2': []})
+        self.assertEqual(apps.get_model('portfolio', 'Tag').objects.count(), 3)
+
+        call_command('migrate', 'portfolio', verbosity=0)
+        for tag, expected in (('Python', ['P1', 'P0']), ('GitHub', ['P1']), ('Rust', [])):
+            response = self.client.get(f'/api/projects/?tag={tag}', HTTP_ACCEPT='application/json')
+            self.assertEqual([row['title'] for row in response.json()['results']], expected, tag)
+            self.assertTrue(all(tag in row['tags_list'] for row in response.json()['results']))
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    def test_report_is_json_with_every_scenario(self):
+        get_cache().set('portfolio:sentinel', 'kept')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            call_command('benchmark', sizes='3', iterations=2, webhooks=2, rate_limit=2,
+                         output=path, use_current_database=True, stderr=io.StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+
+        scenarios = {result['scenario'] for result in report['results']}
+        self.assertTrue({'api.projects.cold', 'api.bootstrap.warm', 'sync.cold', 'sync.unchanged',
+                         'sync.rate_limited', 'webhook.enqueue', 'webhook.drain'} <= scenarios)
+        for result in report['results']:
+            self.assertEqual(result['size'], 3)
+            if 'latency_ms' in result:
+                self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['max'])
+        # A warm read is served from the cache without touching the database
+        warm = next(result for result in report['results'] if result['scenario'] == 'api.projects.warm')
+        self.assertEqual(warm['queries']['max'], 0)
+        # Its cache clears hit a private cache, never the site's
+        self.assertEqual(get_cache().get('portfolio:sentinel'), 'kept')
+
+
+@override_settings(CACHES=REDIS_LIKE_CACHES)
+class QueryBudgetTests(TransactionTestCase):
+    # Every endpoint must stay within the budget its view declares, and the
+    # number of queries must not grow with the amount of data.
+    SIZES = (1, 10, 50)
+
+    READ_PATHS = (
+        '/',
+        '/api/profile/',
+        '/api/profile/{profile}/',
+        '/api/projects/',
+        '/api/projects/?ordering=-stars&page_size=5',
+        '/api/projects/?tag=Django',
+        '/api/projects/{project}/',
+        '/api/projects/{project}/history/',
+        '/api/certificates/',
+        '/api/certificates/{certificate}/',
+        '/api/skills/?ordering=-bytes',
+        '/api/skills/{skill}/',
+        '/api/bootstrap/',
+        '/api/search/?q=project',
+        '/api/async/profile/',
+        '/api/async/projects/',
+        '/api/async/projects/{project}/',
+        '/api/async/certificates/',
+        '/api/async/certificates/{certificate}/',
+        '/api/async/skills/',
+        '/api/async/bootstrap/',
+        '/api/async/search/?q=project',
+        '/metrics',
+    )
+
+    def seed(self, size):
+        user = User.objects.create_user('owner', is_staff=True, is_superuser=True)
+        profile = Profile.objects.create(user=user, bio='Bio', email='owner@example.com')
+        tags = [Tag.objects.create(name=name) for name in ('Django', 'Python', 'GitHub')]
+        skills = [Skill.objects.create(name=name, category='Backend') for name in ('Python', 'Go')]
+        for index in range(size):
+            project = Project.objects.create(
+                github_url=f'https://github.com/owner/project-{index}', title=f'Project {index}',
+                description='A project', stars=index,
+            )
+            project.tags.set(tags[:1 + index % len(tags)])
+            for skill in skills:
+                ProjectLanguage.objects.create(project=project, skill=skill, bytes=100 * (index + 1))
+            Certificate.objects.create(name=f'Certificate {index}', issuer='Issuer', issue_date=date(2025, 1, 1))
+        return {
+            'user': user, 'profile': profile.pk, 'project': Project.objects.first().pk,
+            'certificate': Certificate.objects.first().pk, 'skill': skills[0].pk,
+        }
+
+    def reset(self):
+        for model in (ProjectLanguage, Project, Certificate, Skill, Tag, Profile, User):
+            model.objects.all().delete()
+        get_cache().clear()
+
+    def measure(self, client, method, path, **extra):
+        # Returns (allowed queries, queries run, response) for one cold request
+        budget = budget_for(resolve(urlsplit(path).path), method)
+        self.assertIsNotNone(budget, f"{method} {path} declares no query budget")
+        if settings.SESSION_COOKIE_NAME in client.cookies:
+            budget += SESSION_QUERY_ALLOWANCE
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as captured:
+            if isinstance(client, AsyncClient):
+                response = async_to_sync(getattr(client, method.lower()))(path, **extra)
+            else:
+                response = getattr(client, method.lower())(path, **extra)
+        return budget, view_query_count(captured), response
+
+    def assert_within_budget(self, client, method, path, expected_status=200, **extra):
+        budget, count, response = self.measure(client, method, path, **extra)
+        self.assertEqual(response.status_code, expected_status, f"{method} {path}: {response.content[:200]!r}")
+        self.assertLessEqual(count, budget, f"{method} {path} ran {count} queries, budget is {budget}")
+        return count
+
+    @override_settings(METRICS_TOKEN='scraper')
+    def test_reads_stay_within_budget_at_every_size(self):
+        counts = {}
+        for size in self.SIZES:
+            self.reset()
+            ids = self.seed(size)
+            for template in self.READ_PATHS:
+                client = AsyncClient() if '/async/' in template else Client()
+                extra = {'HTTP_AUTHORIZATION': 'Bearer scraper'} if template == '/metrics' else {}
+                count = self.assert_within_budget(client, 'GET', template.format(**ids), **extra)
+                counts.setdefault(template, set()).add(count)
+        for template, seen in counts.items():
+            self.assertEqual(len(seen), 1, f"{template} runs more queries as data grows: {sorted(seen)}")
+
+    def test_writes_stay_within_budget(self):
+        ids = self.seed(10)
+        client = Client()
+        client.force_login(ids['user'])
+        json_body = {'content_type': 'application/json'}
+
+        self.assert_within_budget(client, 'PUT', f"/api/profile/{ids['profile']}/", data={'bio': 'New'}, **json_body)
+        self.assert_within_budget(client, 'POST', '/api/projects/', 201, data={
+            'title': 'New', 'description': 'New', 'github_url': 'https://github.com/owner/new'}, **json_body)
+        self.assert_within_budget(client, 'PATCH', f"/api/projects/{ids['project']}/", data={'stars': 3}, **json_body)
+        self.assert_within_budget(client, 'DELETE', f"/api/projects/{ids['project']}/", 204)
+        self.assert_within_budget(client, 'POST', '/api/certificates/', 201, data={
+            'name': 'New', 'issuer': 'New', 'issue_date': '2025-01-01'}, **json_body)
+        self.assert_within_budget(client, 'PATCH', f"/api/certificates/{ids['certificate']}/", data={'name': 'X'}, **json_body)
+        self.assert_within_budget(client, 'DELETE', f"/api/certificates/{ids['certificate']}/", 204)
+        self.assert_within_budget(client, 'POST', '/api/skills/', 201, data={'name': 'Rust', 'category': 'Backend'}, **json_body)
+        self.assert_within_budget(client, 'PATCH', f"/api/skills/{ids['skill']}/", data={'category': 'Tools'}, **json_body)
+        self.assert_within_budget(client, 'DELETE', f"/api/skills/{ids['skill']}/", 204)
+
+    def test_sync_and_webhook_stay_within_budget_at_every_size(self):
+        counts = {}
+        for size in self.SIZES:
+            self.reset()
+            GitHubSyncState.objects.all().delete()
+            user = User.objects.create_user('owner', is_staff=True, is_superuser=True)
+            client = Client()
+            client.force_login(user)
+            with FakeGitHub(repos=size) as github, override_settings(
+                GITHUB_API_URL=github.url, GITHUB_USERNAME=github.username, GITHUB_WEBHOOK_SECRET='secret',
+            ):
+                for label in ('cold', 'unchanged'):
+                    count = self.assert_within_budget(client, 'GET', '/api/projects/sync_all_github/')
+                    counts.setdefault(f'sync.{label}', set()).add(count)
+                for path in ('/webhook/github/', '/webhook/github/async/'):
+                    webhook_client = AsyncClient() if 'async' in path else Client()
+                    body = json.dumps(github.push_payload(0))
+                    count = self.assert_within_budget(
+                        webhook_client, 'POST', path, 202, data=body, content_type='application/json',
+                        headers={
+                            'X-GitHub-Event': 'push', 'X-GitHub-Delivery': f'{path}-{size}',
+                            'X-Hub-Signature-256': webhooks.sign(body.encode(), 'secret'),
+                        },
+                    )
+                    counts.setdefault(path, set()).add(count)
+        for name, seen in counts.items():
+            self.assertEqual(len(seen), 1, f"{name} runs more queries as data grows: {sorted(seen)}")
+
+    def test_every_route_declares_a_budget(self):
+        def walk(patterns, prefix=''):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from walk(pattern.url_patterns, prefix + str(pattern.pattern))
+                else:
+                    yield prefix + str(pattern.pattern), pattern.callback
+
+        for route, callback in walk(get_resolver().url_patterns):
+            view_class = getattr(callback, 'cls', None)
+            if route.startswith(('admin/', '^media/')) or getattr(view_class, '__module__', '').startswith('rest_framework'):
+                continue
+            actions = getattr(callback, 'actions', None) or {}
+            if actions:
+                missing = set(actions.values()) - set(getattr(view_class, 'query_budgets', {}))
+                self.assertFalse(missing, f"{route} has no query budget for {sorted(missing)}")
+            elif view_class is not None:
+                self.assertTrue(getattr(view_class, 'query_budgets', None), f"{route} declares no query budgets")
+            else:
+                self.assertIsNotNone(getattr(callback, 'query_budget', None), f"{route} declares no query budget")
+
+    def test_request_over_budget_is_reported(self):
+        self.seed(1)
+        before = dict(metrics.QUERY_BUDGET_EXCEEDED.values)
+        with mock.patch.object(ProfileViewSet, 'query_budgets', {'list': 0}), \
+                self.assertLogs('portfolio.middleware', 'WARNING') as logs:
+            Client().get('/api/profile/')
+        self.assertIn('over its budget of 0', logs.output[0])
+        key = ('profile-list',)
+        self.assertEqual(metrics.QUERY_BUDGET_EXCEEDED.values.get(key, 0), before.get(key, 0) + 1)
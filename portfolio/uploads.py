@@ -0,0 +1,126 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_content
+from .metrics import track_outbound
+from .models import Profile, Certificate
+
+# Resized copies Cloudinary renders at upload time (eager transformations),
+# keyed by the Profile field their URL is stored in. The hero image is shown
+# at 300x300, so thumb/medium cover 1x and 2x screens.
+PROFILE_DERIVATIVES = {
+    'profile_pic_thumb': {'width': 300, 'height': 300, 'crop': 'fill', 'gravity': 'face'},
+    'profile_pic_medium': {'width': 600, 'height': 600, 'crop': 'fill', 'gravity': 'face'},
+    'profile_pic_webp': {'width': 600, 'height': 600, 'crop': 'fill', 'gravity': 'face', 'format': 'webp'},
+}
+
+_executor = None
+_uploader = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix='upload')
+    return _executor
+
+
+def get_uploader():
+    # cloudinary (and the urllib3/certifi stack under it) is only needed once
+    # an admin uploads a file, so it is imported and configured on first use
+    # rather than by every process at startup
+    global _uploader
+    if _uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET,
+        )
+        _uploader = cloudinary.uploader
+    return _uploader
+
+
+def spool(uploaded_file):
+    # Copies the request's upload to a file that outlives the request,
+    # chunk by chunk so a large PDF is never held in memory at once
+    suffix = os.path.splitext(uploaded_file.name or '')[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False, dir=settings.UPLOAD_SPOOL_DIR or None) as tmp:
+        for chunk in uploaded_file.chunks():
+            tmp.write(chunk)
+    return tmp.name
+
+
+def upload_large(path, **options):
+    # Streams the file to Cloudinary in UPLOAD_CHUNK_SIZE parts
+    with track_outbound('cloudinary'):
+        return get_uploader().upload_large(path, chunk_size=settings.UPLOAD_CHUNK_SIZE, **options)
+
+
+def upload_profile_pic(profile_id, path):
+    res = upload_large(
+        path, folder='portfolio/profiles', resource_type='image',
+        eager=list(PROFILE_DERIVATIVES.values()),
+    )
+    # Any copy Cloudinary did not return is cleared, never left pointing at
+    # the previous picture
+    fields = {'profile_pic': res['secure_url'], **dict.fromkeys(PROFILE_DERIVATIVES, '')}
+    for field, derived in zip(PROFILE_DERIVATIVES, res.get('eager') or []):
+        fields[field] = derived['secure_url']
+    Profile.objects.filter(pk=profile_id).update(**fields)
+
+
+def upload_credential_file(certificate_id, path):
+    res = upload_large(path, folder='portfolio/certificates', resource_type='auto')
+    Certificate.objects.filter(pk=certificate_id).update(credential_file=res['secure_url'])
+
+
+# Job payload 'task' -> function(pk, path)
+UPLOAD_TASKS = {
+    'profile_pic': upload_profile_pic,
+    'credential_file': upload_credential_file,
+}
+
+
+def run_upload(payload):
+    # 'upload' job handler (see jobs.HANDLERS). The spooled file is only
+    # removed once the upload went through, so a failed one can be retried.
+    UPLOAD_TASKS[payload['task']](payload['pk'], payload['path'])
+    # update() sends no signals, so invalidate the API cache here
+    invalidate_content()
+    os.remove(payload['path'])
+
+
+def run_now(job_pk):
+    # Runs on the upload executor right after the commit. The claim makes
+    # sure the job runs once even if run_jobs reaches it too; a failure is
+    # rescheduled by jobs.run_job like any other job.
+    from . import jobs  # jobs imports this module for its handler
+    try:
+        job = jobs.claim(job_pk)
+        if job is not None:
+            jobs.run_job(job)
+    finally:
+        connection.close()
+
+
+def start_upload(task, pk, uploaded_file):
+    # Returns as soon as the file is spooled to disk. The upload is queued as
+    # an 'upload' job and started on a background thread once the current
+    # transaction commits, so it never races the save of the row it updates.
+    # The job is only due for run_jobs after JOB_LOCK_TIMEOUT: it picks up
+    # uploads this process never got to (a recycled worker) and retries.
+    from . import jobs
+    path = spool(uploaded_file)
+    job = jobs.enqueue(
+        'upload', path, {'task': task, 'pk': pk, 'path': path},
+        run_after=timezone.now() + timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+    )
+    transaction.on_commit(lambda: get_executor().submit(run_now, job.pk))
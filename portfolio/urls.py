@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProfileViewSet, ProjectViewSet, CertificateViewSet, SkillViewSet
+from . import async_views
+from .views import ProfileViewSet, ProjectViewSet, CertificateViewSet, SkillViewSet, BootstrapView, SearchView
 
 router = DefaultRouter()
 router.register(r'profile', ProfileViewSet, basename='profile')
@@ -9,5 +10,17 @@ router.register(r'certificates', CertificateViewSet)
 router.register(r'skills', SkillViewSet)
 
 urlpatterns = [
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+    path('search/', SearchView.as_view(), name='search'),
+
+    # Async (ASGI) read endpoints, see async_views.py
+    path('async/profile/', async_views.profile, name='async-profile'),
+    path('async/projects/', async_views.project_list, name='async-project-list'),
+    path('async/projects/<int:pk>/', async_views.project_detail, name='async-project-detail'),
+    path('async/certificates/', async_views.certificate_list, name='async-certificate-list'),
+    path('async/certificates/<int:pk>/', async_views.certificate_detail, name='async-certificate-detail'),
+    path('async/skills/', async_views.skill_list, name='async-skill-list'),
+    path('async/bootstrap/', async_views.bootstrap, name='async-bootstrap'),
+    path('async/search/', async_views.search_view, name='async-search'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
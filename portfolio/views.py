@@ -1,37 +1,30 @@
-import json
-import requests
-import cloudinary.uploader  # Import the generic uploader
+import hmac
+
+from django.conf import settings
 from django.http import HttpResponse, JsonResponse
+from django.utils.functional import cached_property
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework import viewsets, status, permissions
+from rest_framework import filters, viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Profile, Project, Certificate, Skill
-from .serializers import ProfileSerializer, ProjectSerializer, CertificateSerializer, SkillSerializer
-
-# --- HELPER FUNCTION FOR SKILL CATEGORIZATION ---
-def get_skill_category(language_name):
-    if not language_name: 
-        return 'Soft'
-    lang = language_name.lower()
-    
-    frontend = ['javascript', 'typescript', 'html', 'css', 'vue', 'react', 'angular', 'svelte', 'jsx', 'tsx', 'scss', 'sass', 'dockerfile']
-    backend = ['python', 'django', 'java', 'c++', 'ruby', 'php', 'go', 'rust', 'swift', 'sql', 'kotlin', 'scala', 'elixir']
-    tools = ['docker', 'git', 'linux', 'bash', 'shell', 'makefile', 'jupyter notebook', 'vim script', 'cuda']
-    
-    if any(f in lang for f in frontend): 
-        return 'Frontend'
-    if any(b in lang for b in backend): 
-        return 'Backend'
-    if any(t in lang for t in tools): 
-        return 'Tools'
-    return 'Soft'
-
-
-class ProfileViewSet(viewsets.ModelViewSet):
+from .serializers import (
+    ProfileSerializer, ProjectSerializer, CertificateSerializer, SkillSerializer,
+    project_values, project_rows, certificate_values, certificate_rows, skill_values, skill_rows,
+)
+from . import history, metrics, search, sync, uploads, webhooks
+from .budgets import query_budget
+from .cache import CachedResponseMixin, get_content_version, is_cacheable_request
+from .fastjson import PlainJSON
+from .pagination import PortfolioCursorPagination
+
+class ProfileViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 3, 'update': 2, 'partial_update': 2, 'destroy': 3}
 
     def list(self, request, *args, **kwargs):
         # Returns the first (and usually only) profile
@@ -47,22 +40,11 @@ class ProfileViewSet(viewsets.ModelViewSet):
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         
         # 1. Handle Image Upload
+        # Spooled to disk and pushed to Cloudinary in the background; the
+        # new URLs (and resized copies) are saved when it finishes.
         if 'profile_pic' in request.FILES:
-            try:
-                # Manual upload to Cloudinary
-                upload_result = cloudinary.uploader.upload(
-                    request.FILES['profile_pic'],
-                    folder='portfolio/profiles',
-                    resource_type='image'
-                )
-                
-                # Save the returned URL to the database
-                profile.profile_pic = upload_result['secure_url']
-                profile.save()
-                
-                return Response(ProfileSerializer(profile).data)
-            except Exception as e:
-                return Response({"error": f"Upload failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            uploads.start_upload('profile_pic', profile.pk, request.FILES['profile_pic'])
+            return Response(ProfileSerializer(profile).data, status=status.HTTP_202_ACCEPTED)
         
         # 2. Handle Text Updates (Bio, Name, etc)
         serializer = self.get_serializer(profile, data=request.data, partial=True)
@@ -73,174 +55,197 @@ class ProfileViewSet(viewsets.ModelViewSet):
         return Response(ProfileSerializer(profile).data)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+class ValuesListMixin:
+    # JSON list reads are built from .values() rows (see the fast path in
+    # serializers.py) and rendered by FastJSONRenderer. The browsable API
+    # and ?format= requests keep going through the serializers.
+    # fast_rows = (values function, rows function)
+    fast_rows = None
+
+    def list(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return super().list(request, *args, **kwargs)
+        return Response(self.list_rows(self.filter_queryset(self.get_queryset())))
+
+    def list_rows(self, queryset):
+        # Same body as ListModelMixin.list, paginated the same way
+        get_values, get_rows = self.fast_rows
+        fields = list(self.get_serializer().fields)
+        values = get_values(queryset)
+        page = self.paginate_queryset(values)
+        if page is None:
+            return PlainJSON(get_rows(list(values), fields))
+        return PlainJSON(self.get_paginated_response(get_rows(page, fields)).data)
+
+
+class ProjectViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Project.objects.prefetch_related('tags')
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {
+        'list': 2, 'retrieve': 2, 'create': 3, 'update': 4, 'partial_update': 4, 'destroy': 9,
+        'sync_all_github': 25, 'history': 2,
+    }
+    pagination_class = PortfolioCursorPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['stars', 'created_at', 'id']
+    ordering = ['-created_at', '-id']
+    fast_rows = (project_values, project_rows)
+    cached_actions = ('list', 'retrieve', 'history')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?tag=Django is an indexed join through the tag table
+        tag = self.request.query_params.get('tag')
+        if tag:
+            queryset = queryset.filter(tags__name=tag)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        # ?days= of stars and language history (default a year) from the
+        # precomputed rollups; ?resolution=hour|day|week overrides the
+        # resolution history.pick_resolution would choose
+        try:
+            days = int(request.query_params.get('days', 365))
+        except ValueError:
+            raise ValidationError({'days': "Must be a whole number of days."})
+        if not 1 <= days <= 3650:
+            raise ValidationError({'days': "Must be between 1 and 3650."})
+        resolution = request.query_params.get('resolution')
+        if resolution is not None and resolution not in history.RESOLUTIONS:
+            raise ValidationError({'resolution': f"Must be one of {', '.join(history.RESOLUTIONS)}."})
+        if not pk.isdigit() or not Project.objects.filter(pk=pk).exists():
+            raise NotFound()
+        return Response(PlainJSON(history.project_history(int(pk), days, resolution)))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
     def sync_all_github(self, request):
-        github_username = "DarkSun2003" 
-        api_url = f"https://api.github.com/users/{github_username}/repos?per_page=100"
-        
         try:
-            response = requests.get(api_url)
-            response.raise_for_status()
-            repos = response.json()
-            
-            count_new = 0
-            count_updated = 0
-            
-            # Keep track of valid URLs to clean up deleted ones later
-            valid_github_urls = []
-            
-            for repo in repos:
-                valid_github_urls.append(repo['html_url'])
-                
-                # 1. Create or Update Project
-                project, created = Project.objects.get_or_create(
-                    github_url=repo['html_url'],
-                    defaults={
-                        'title': repo['name'],
-                        'description': repo['description'] or "No description provided.",
-                        'stars': repo['stargazers_count'],
-                        'tags': 'GitHub, Project',
-                        'is_synced': True
-                    }
-                )
-                
-                if created:
-                    count_new += 1
-                else:
-                    # Update star count if repo already exists
-                    project.stars = repo['stargazers_count']
-                    project.save()
-                    count_updated += 1
-
-                # 2. DEEP SYNC SKILLS (Get ALL languages for this repo)
-                languages_url = repo.get('languages_url')
-                
-                if languages_url:
-                    try:
-                        lang_res = requests.get(languages_url)
-                        
-                        if lang_res.status_code == 200:
-                            lang_data = lang_res.json() 
-                            
-                            for lang_name in lang_data.keys():
-                                category = get_skill_category(lang_name)
-                                Skill.objects.get_or_create(
-                                    name=lang_name,
-                                    defaults={'category': category}
-                                )
-                        elif lang_res.status_code == 403:
-                            print(f"Rate limit reached trying to fetch languages for {repo['name']}")
-                            print("WARNING: GitHub API Rate Limit Reached. Skills may be incomplete.")
-                            
-                    except Exception as e:
-                        print(f"Error fetching detailed languages for {repo['name']}: {e}")
-            
-            # --- NEW CLEANUP LOGIC ---
-            # Delete projects from DB that are no longer on GitHub
-            deleted_count = Project.objects.exclude(github_url__in=valid_github_urls).delete()[0]
-            
-            message = f"Sync Complete. Added {count_new} new. Updated {count_updated} existing."
-            if deleted_count > 0:
-                message += f" Removed {deleted_count} deleted repositories."
-                
+            message = sync.sync_github_account(settings.GITHUB_USERNAME)
             return Response({"message": message}, status=status.HTTP_200_OK)
             
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CertificateViewSet(viewsets.ModelViewSet):
+class CertificateViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Certificate.objects.all()
     serializer_class = CertificateSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 1, 'update': 2, 'partial_update': 2, 'destroy': 4}
+    pagination_class = PortfolioCursorPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['issue_date', 'id']
+    ordering = ['-issue_date', '-id']
+    fast_rows = (certificate_values, certificate_rows)
 
 
-class SkillViewSet(viewsets.ModelViewSet):
-    queryset = Skill.objects.all()
+class SkillViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Skill.objects.with_usage()
     serializer_class = SkillSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 2, 'update': 2, 'partial_update': 2, 'destroy': 5}
+    # ?ordering=-bytes ranks skills by how much code actually uses them
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['bytes', 'name', 'id']
+    ordering = ['id']
+    fast_rows = (skill_values, skill_rows)
+
+
+def build_bootstrap_payload():
+    # Everything the home page needs, built with one query per resource
+    # (plus one for project tags) no matter how many rows there are. Rows
+    # come from the values() fast path, so the payload is plain JSON data.
+    # Same orderings as the list endpoints and the snapshot export.
+    grouped = {}
+    for skill in skill_rows(skill_values(Skill.objects.with_usage().order_by('-bytes', 'id'))):
+        grouped.setdefault(skill['category'], []).append(skill)
+
+    return {
+        'profile': ProfileSerializer(Profile.objects.first()).data,
+        'skills': grouped,
+        'projects': project_rows(
+            project_values(Project.objects.order_by('-created_at', '-id')), ProjectSerializer.Meta.fields),
+        'certificates': certificate_rows(
+            certificate_values(Certificate.objects.order_by('-issue_date', '-id')), CertificateSerializer.Meta.fields),
+    }
+
+
+class BootstrapView(CachedResponseMixin, APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cached_actions = ('get',)
+    query_budgets = {'get': 5}
+
+    def get(self, request, *args, **kwargs):
+        return Response(PlainJSON(build_bootstrap_payload()))
+
+
+class SearchView(CachedResponseMixin, APIView):
+    # /api/search/?q= over projects, skills and certificates, ranked
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cached_actions = ('get',)
+    query_budgets = {'get': 4}
+
+    def get(self, request, *args, **kwargs):
+        q = request.query_params.get('q', '').strip()
+        return Response({'query': q, 'results': search.search(q) if q else []})
+
+
+class HomePage:
+    # Template context for the server-rendered home page. The payload is only
+    # built when a cached fragment misses, so a fully cached render runs no
+    # queries at all.
+    def __init__(self):
+        self.version = get_content_version()
+
+    @cached_property
+    def data(self):
+        return build_bootstrap_payload()
+
+
+@query_budget(0)
+def metrics_view(request):
+    # Prometheus scrape target for this process. Hidden until a token is
+    # configured: the numbers name every view and its traffic.
+    if not settings.METRICS_TOKEN:
+        return HttpResponse('Not Found', status=404)
+    if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponse('Unauthorized', status=401)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @csrf_exempt 
+@query_budget(6)
 def github_webhook(request):
     # 1. Handle GitHub "Ping" (GET request) - Used to verify the URL is valid
     if request.method == 'GET':
         return HttpResponse('OK', status=200)
 
     # 2. Handle Events (POST request)
+    # The webhook only validates and enqueues; `manage.py run_jobs` does the
+    # actual sync so GitHub gets its answer in a few milliseconds.
     if request.method == 'POST':
-        try:
-            # Check what type of event this is
-            event_type = request.META.get('HTTP_X_GITHUB_EVENT')
-            payload = json.loads(request.body)
-
-            # --- EVENT: REPOSITORY DELETED ---
-            if event_type == 'delete':
-                repo_data = payload.get('repository', {})
-                repo_url = repo_data.get('html_url')
-                if repo_url:
-                    deleted_count = Project.objects.filter(github_url=repo_url).delete()[0]
-                    if deleted_count > 0:
-                        print(f"Webhook: Deleted repository {repo_data.get('name')} from portfolio.")
-                    return JsonResponse({'status': 'success', 'message': 'Repository removed from portfolio'})
-
-            # --- EVENT: PUSH (Code updated) ---
-            if event_type == 'push':
-                if 'repository' in payload and 'pusher' in payload:
-                    repo_data = payload['repository']
-                    repo_name = repo_data['name']
-                    repo_url = repo_data['html_url']
-                    repo_description = repo_data.get('description', "No description provided.")
-                    
-                    # 1. Sync Project Info
-                    project, created = Project.objects.get_or_create(
-                        github_url=repo_url,
-                        defaults={
-                            'title': repo_name,
-                            'description': repo_description,
-                            'stars': 0, 
-                            'tags': 'GitHub, Auto-Synced',
-                            'is_synced': True
-                        }
-                    )
-                    
-                    if created:
-                        print(f"Webhook: New project added - {repo_name}")
-                    else:
-                        if project.description != repo_description:
-                            project.description = repo_description
-                            project.save()
-                        print(f"Webhook: Project updated - {repo_name}")
-
-                    # 2. SYNC SKILLS AUTOMATICALLY (Deep Sync Logic)
-                    languages_url = repo_data.get('languages_url')
-                    
-                    if languages_url:
-                        try:
-                            # Fetch the specific languages for THIS repo
-                            lang_res = requests.get(languages_url)
-                            
-                            if lang_res.status_code == 200:
-                                lang_data = lang_res.json()
-                                
-                                for lang_name in lang_data.keys():
-                                    category = get_skill_category(lang_name)
-                                    Skill.objects.get_or_create(
-                                        name=lang_name,
-                                        defaults={'category': category}
-                                    )
-                        except Exception as e:
-                            print(f"Webhook Skill Sync Error: {e}")
-
-                    return JsonResponse({'status': 'success', 'message': 'Project synced via Webhook'})
+        # Check what type of event this is. Stars, issues, workflow runs etc.
+        # are acknowledged without reading or parsing the body.
+        event_type = request.META.get('HTTP_X_GITHUB_EVENT')
+        if event_type not in webhooks.HANDLED_EVENTS:
+            return JsonResponse({'status': 'ignored', 'message': f'Event {event_type} not handled'})
 
+        if not webhooks.verify_signature(request.body, request.META.get('HTTP_X_HUB_SIGNATURE_256')):
+            return HttpResponse('Invalid signature', status=403)
+
+        if event_type == 'ping':
+            return JsonResponse({'status': 'success', 'message': 'pong'})
+
+        try:
+            data, status_code = webhooks.queue_event(
+                event_type, request.META.get('HTTP_X_GITHUB_DELIVERY'), request.body
+            )
+            if data is not None:
+                return JsonResponse(data, status=status_code)
         except Exception as e:
             print(f"Webhook Error: {e}")
             return HttpResponse(str(e), status=400)
 
-    return HttpResponse('Method not allowed', status=405)
\ No newline at end of file
+    return HttpResponse('Method not allowed', status=405)
@@ -0,0 +1,111 @@
+import sys
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+
+# --- BOOT WARM-UP ---
+# Run by each server process after it loads the app and before it accepts
+# traffic (gunicorn.conf.py post_worker_init, myproject/asgi.py), so the
+# first visitor after a deploy or scale-up does not pay for the DB
+# connection, the URLconf import, template compilation and cold caches.
+# The hot pages are requested through the full middleware stack: that fills
+# the shared API cache (and its compressed copies) and the home page
+# fragments. Only the first process to boot on a new content version does
+# the real work; the others get cache hits.
+
+
+def warmup_host():
+    if settings.WARMUP_HOST:
+        return settings.WARMUP_HOST
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and '/' not in host and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def request_environ(path, host):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'HTTP_ACCEPT': 'application/json' if path.startswith('/api/') else 'text/html',
+        'HTTP_ACCEPT_ENCODING': ', '.join(settings.COMPRESSION_ENCODINGS),
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'https',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def fetch(handler, path, host):
+    # Returns the status code; the body is read so streaming responses finish
+    status = []
+    response = handler(request_environ(path, host), lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+def connect_threads(executor, count):
+    # Django connections are per thread, so with a threaded server the
+    # connection has to be opened in each of the pool's threads. The barrier
+    # holds every task until all have started, which makes the pool start
+    # `count` distinct threads instead of reusing the first one.
+    barrier = threading.Barrier(count, timeout=10)
+
+    def connect():
+        try:
+            connection.ensure_connection()
+        except Exception:
+            barrier.abort()
+            raise
+        barrier.wait()
+
+    for future in [executor.submit(connect) for _ in range(count)]:
+        future.result()
+
+
+def warm_up(executor=None, threads=1):
+    # Returns {step: seconds}. `executor` is the server's request thread pool
+    # (gunicorn gthread), if any. Failures are logged and never stop the
+    # boot: a process that could not warm up still serves, just colder.
+    timings = {}
+    start = time.perf_counter()
+    try:
+        if executor is not None:
+            connect_threads(executor, threads)
+        else:
+            connection.ensure_connection()
+    except Exception as e:
+        print(f"Warm-up: database connection failed: {e}")
+    timings['db'] = time.perf_counter() - start
+
+    handler = WSGIHandler()
+    host = warmup_host()
+    for path in settings.WARMUP_PATHS:
+        start = time.perf_counter()
+        try:
+            status = fetch(handler, path, host)
+            if status != 200:
+                print(f"Warm-up: GET {path} returned {status}")
+        except Exception as e:
+            print(f"Warm-up: GET {path} failed: {e}")
+        timings[path] = time.perf_counter() - start
+
+    summary = ', '.join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items())
+    print(f"Warm-up done in {sum(timings.values()) * 1000:.0f} ms ({summary})")
+    return timings
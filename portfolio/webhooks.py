@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import github, jobs
+from .models import WebhookDelivery
+
+# Events github_webhook acts on. Anything else is acknowledged and dropped
+# before the body is read.
+HANDLED_EVENTS = {'ping', 'push', 'delete'}
+
+
+def sign(body, secret):
+    # The X-Hub-Signature-256 value GitHub sends for `body`
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, signature_header):
+    # Checks X-Hub-Signature-256 against GITHUB_WEBHOOK_SECRET. Without a
+    # secret every delivery is refused: an open endpoint would let anyone
+    # queue syncs and deletes.
+    secret = settings.GITHUB_WEBHOOK_SECRET
+    if not secret or not signature_header:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature_header)
+
+
+def record_delivery(delivery_id):
+    # Returns False if this delivery was already accepted. A single INSERT
+    # against the unique index, so the check is O(1).
+    if not delivery_id:
+        return True
+    try:
+        with transaction.atomic():
+            WebhookDelivery.objects.create(delivery_id=delivery_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def queue_event(event_type, delivery_id, body):
+    # Records the delivery and enqueues the sync job in one transaction.
+    # Returns (response payload, HTTP status). Shared by the WSGI and ASGI
+    # webhook views, which only differ in how they call it.
+    with transaction.atomic():
+        # Redelivered events are dropped before any parsing
+        if not record_delivery(delivery_id):
+            return {'status': 'duplicate', 'message': 'Delivery already processed'}, 200
+
+        payload = json.loads(body)
+        repo_data = payload.get('repository') or {}
+        repo_url = repo_data.get('html_url')
+
+        # The worker fetches languages_url; anything off the GitHub API is
+        # refused here rather than queued
+        languages_url = repo_data.get('languages_url')
+        if languages_url and not github.is_api_url(languages_url):
+            return {'status': 'error', 'message': 'languages_url is not a GitHub API URL'}, 400
+
+        # --- EVENT: REPOSITORY DELETED ---
+        if event_type == 'delete':
+            if repo_url:
+                jobs.enqueue('github_delete', repo_url, repo_data)
+                return {'status': 'queued', 'message': 'Repository removal queued'}, 202
+
+        # --- EVENT: PUSH (Code updated) ---
+        if event_type == 'push':
+            if repo_url and 'pusher' in payload:
+                jobs.enqueue('github_push', repo_url, repo_data)
+                return {'status': 'queued', 'message': 'Project sync queued'}, 202
+
+    return None, 405
+
+
+def evict_expired_deliveries():
+    cutoff = timezone.now() - timedelta(seconds=settings.GITHUB_WEBHOOK_DELIVERY_TTL)
+    return WebhookDelivery.objects.filter(received_at__lt=cutoff).delete()[0]